@@ -18,44 +18,52 @@ All endpoints follow REST conventions and include:
 """
 
 # Endpoint categories
-PATIENT_ENDPOINTS = [
+PATIENT_ENDPOINTS = (
     "GET /patients",
     "POST /patients", 
     "GET /patients/{id}",
     "PUT /patients/{id}",
     "DELETE /patients/{id}",
     "GET /patients/{id}/feedbacks",
-    "GET /patients/summary"
-]
+    "GET /patients/summary",
+    "POST /patients/feedbacks:batch"
+)
 
-FEEDBACK_ENDPOINTS = [
+FEEDBACK_ENDPOINTS = (
     "GET /feedbacks",
     "POST /feedbacks",
+    "POST /feedbacks/bulk",
     "GET /feedbacks/{id}", 
     "PUT /feedbacks/{id}",
     "DELETE /feedbacks/{id}",
     "GET /feedbacks/stats",
     "GET /feedbacks/urgent",
+    "GET /feedbacks/export",
     "POST /feedbacks/{id}/mark-urgent",
     "POST /feedbacks/{id}/resolve"
-]
+)
 
-DEPARTMENT_ENDPOINTS = [
+DEPARTMENT_ENDPOINTS = (
     "GET /departments",
     "POST /departments",
     "GET /departments/{id}",
     "PUT /departments/{id}", 
     "DELETE /departments/{id}",
     "GET /departments/{id}/stats"
-]
+)
 
-HEALTH_ENDPOINTS = [
+HEALTH_ENDPOINTS = (
     "GET /health",
     "GET /health/detailed",
     "GET /health/ready", 
     "GET /health/live",
     "GET /version"
-]
+)
 
 # Total endpoint count
-TOTAL_ENDPOINTS = len(PATIENT_ENDPOINTS + FEEDBACK_ENDPOINTS + DEPARTMENT_ENDPOINTS + HEALTH_ENDPOINTS)
\ No newline at end of file
+TOTAL_ENDPOINTS = (
+    len(PATIENT_ENDPOINTS)
+    + len(FEEDBACK_ENDPOINTS)
+    + len(DEPARTMENT_ENDPOINTS)
+    + len(HEALTH_ENDPOINTS)
+)
\ No newline at end of file
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, exists, func, case, desc, tuple_
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional
 import logging
 
 from ...database.connection import get_db
-from ...database.models import Department
+from ...database.models import Department, Patient, Feedback
 from ...schemas.department import Department as DepartmentSchema, DepartmentCreate, DepartmentUpdate
+from ...utils.pagination import decode_cursor, next_cursor
+from ...utils.cache import remember_department, invalidate_department, invalidate_patient_summaries
 
 logger = logging.getLogger(__name__)
 
@@ -13,56 +18,78 @@ router = APIRouter()
 
 @router.get("/", response_model=List[DepartmentSchema])
 async def get_departments(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip (deprecated, use cursor)", deprecated=True),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all departments"""
     try:
-        departments = db.query(Department).offset(skip).limit(limit).all()
-        logger.info(f"Retrieved {len(departments)} departments")
+        query = select(Department).order_by(desc(Department.created_at), desc(Department.id))
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Department.created_at, Department.id) < (cursor_created_at, cursor_id)
+            )
+        else:
+            query = query.offset(skip)
+        
+        departments = (await db.scalars(query.limit(limit))).all()
+        
+        cursor_header = next_cursor(departments, limit)
+        if cursor_header:
+            response.headers["X-Next-Cursor"] = cursor_header
+        
+        logger.debug("Retrieved %d departments", len(departments))
         return departments
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error retrieving departments: {str(e)}")
+        logger.error("Error retrieving departments: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving departments"
         )
 
 @router.get("/{department_id}", response_model=DepartmentSchema)
-async def get_department(department_id: int, db: Session = Depends(get_db)):
+async def get_department(department_id: int, db: AsyncSession = Depends(get_db)):
     """Get department by ID"""
     try:
-        department = db.query(Department).filter(Department.id == department_id).first()
+        department = await db.get(Department, department_id)
         
         if not department:
-            logger.warning(f"Department {department_id} not found")
+            logger.warning("Department %s not found", department_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Department not found"
             )
         
-        logger.info(f"Retrieved department {department_id}")
+        logger.debug("Retrieved department %s", department_id)
         return department
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving department {department_id}: {str(e)}")
+        logger.error("Error retrieving department %s: %s", department_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving department"
         )
 
 @router.post("/", response_model=DepartmentSchema, status_code=status.HTTP_201_CREATED)
-async def create_department(department_data: DepartmentCreate, db: Session = Depends(get_db)):
+async def create_department(department_data: DepartmentCreate, db: AsyncSession = Depends(get_db)):
     """Create new department"""
     try:
-        # Check if department code already exists
-        existing_department = db.query(Department).filter(
-            Department.code == department_data.code
-        ).first()
+        # Check if department code already exists (always in the database:
+        # the worker-local department cache may be stale)
+        existing_department = await db.scalar(
+            select(Department.id).where(Department.code == department_data.code)
+        )
         
         if existing_department:
             raise HTTPException(
@@ -72,16 +99,25 @@ async def create_department(department_data: DepartmentCreate, db: Session = Dep
         
         db_department = Department(**department_data.model_dump())
         db.add(db_department)
-        db.commit()
-        db.refresh(db_department)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent request took the code since the check above
+            await db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Department code already exists"
+            )
+        await db.refresh(db_department)
+        remember_department(db_department.id)
         
-        logger.info(f"Created department {db_department.id}: {db_department.name}")
+        logger.info("Created department %s: %s", db_department.id, db_department.name)
         return db_department
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating department: {str(e)}")
+        logger.error("Error creating department: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating department"
@@ -91,11 +127,11 @@ async def create_department(department_data: DepartmentCreate, db: Session = Dep
 async def update_department(
     department_id: int, 
     department_data: DepartmentUpdate, 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update department"""
     try:
-        db_department = db.query(Department).filter(Department.id == department_id).first()
+        db_department = await db.get(Department, department_id)
         
         if not db_department:
             raise HTTPException(
@@ -105,10 +141,12 @@ async def update_department(
         
         # Check if new code conflicts with existing department
         if department_data.code:
-            existing_department = db.query(Department).filter(
-                Department.code == department_data.code,
-                Department.id != department_id
-            ).first()
+            existing_department = await db.scalar(
+                select(Department.id).where(
+                    Department.code == department_data.code,
+                    Department.id != department_id
+                )
+            )
             
             if existing_department:
                 raise HTTPException(
@@ -120,26 +158,30 @@ async def update_department(
         for field, value in update_data.items():
             setattr(db_department, field, value)
         
-        db.commit()
-        db.refresh(db_department)
+        await db.commit()
+        await db.refresh(db_department)
+        # Summary pages carry the department name
+        await invalidate_patient_summaries()
         
-        logger.info(f"Updated department {department_id}")
+        logger.info("Updated department %s", department_id)
         return db_department
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating department {department_id}: {str(e)}")
+        logger.error("Error updating department %s: %s", department_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating department"
         )
 
 @router.delete("/{department_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_department(department_id: int, db: Session = Depends(get_db)):
+async def delete_department(department_id: int, db: AsyncSession = Depends(get_db)):
     """Delete department"""
     try:
-        db_department = db.query(Department).filter(Department.id == department_id).first()
+        # Lock the row so a concurrent patient/feedback insert can't slip in
+        # between the emptiness check and the delete
+        db_department = await db.get(Department, department_id, with_for_update=True)
         
         if not db_department:
             raise HTTPException(
@@ -148,31 +190,36 @@ async def delete_department(department_id: int, db: Session = Depends(get_db)):
             )
         
         # Check if department has patients or feedbacks
-        if db_department.patients or db_department.feedbacks:
+        has_dependents = await db.scalar(select(
+            exists().where(Patient.department_id == department_id)
+            | exists().where(Feedback.department_id == department_id)
+        ))
+        if has_dependents:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Cannot delete department with existing patients or feedbacks"
             )
         
-        db.delete(db_department)
-        db.commit()
+        await db.delete(db_department)
+        await db.commit()
+        invalidate_department(department_id)
         
-        logger.info(f"Deleted department {department_id}")
+        logger.info("Deleted department %s", department_id)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting department {department_id}: {str(e)}")
+        logger.error("Error deleting department %s: %s", department_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting department"
         )
 
 @router.get("/{department_id}/stats")
-async def get_department_stats(department_id: int, db: Session = Depends(get_db)):
+async def get_department_stats(department_id: int, db: AsyncSession = Depends(get_db)):
     """Get department statistics"""
     try:
-        department = db.query(Department).filter(Department.id == department_id).first()
+        department = await db.get(Department, department_id)
         
         if not department:
             raise HTTPException(
@@ -180,16 +227,22 @@ async def get_department_stats(department_id: int, db: Session = Depends(get_db)
                 detail="Department not found"
             )
         
-        # Calculate statistics
-        total_patients = len(department.patients)
-        total_feedbacks = len(department.feedbacks)
+        # Calculate statistics in the database (relationships can't be
+        # lazy-loaded on an AsyncSession)
+        total_patients = await db.scalar(
+            select(func.count()).select_from(Patient).where(Patient.department_id == department_id)
+        )
+        feedback_row = (await db.execute(
+            select(
+                func.count(Feedback.id).label("total"),
+                func.avg(Feedback.rating).label("avg_rating"),
+                func.count(case((Feedback.is_urgent == True, 1))).label("urgent")
+            ).where(Feedback.department_id == department_id)
+        )).one()
         
-        if total_feedbacks > 0:
-            avg_rating = sum(f.rating for f in department.feedbacks) / total_feedbacks
-            urgent_count = sum(1 for f in department.feedbacks if f.is_urgent)
-        else:
-            avg_rating = 0.0
-            urgent_count = 0
+        total_feedbacks = feedback_row.total
+        avg_rating = float(feedback_row.avg_rating or 0.0)
+        urgent_count = feedback_row.urgent
         
         stats = {
             "department_id": department_id,
@@ -200,13 +253,13 @@ async def get_department_stats(department_id: int, db: Session = Depends(get_db)
             "urgent_feedbacks": urgent_count
         }
         
-        logger.info(f"Retrieved stats for department {department_id}")
-        return stats
+        logger.debug("Retrieved stats for department %s", department_id)
+        return ORJSONResponse(stats)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving department stats {department_id}: {str(e)}")
+        logger.error("Error retrieving department stats %s: %s", department_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving department statistics"
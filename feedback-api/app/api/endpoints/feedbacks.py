@@ -1,36 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, List, Optional
 import logging
 
+from ...config import settings
 from ...database.connection import get_db
 from ...schemas.feedback import (
     Feedback, FeedbackCreate, FeedbackUpdate, 
     FeedbackWithAnalysis, FeedbackStats
 )
 from ...services.feedback_service import FeedbackService
+from ...utils.cache import (
+    cache,
+    feedback_stats_key,
+    feedback_stats_field,
+    feedback_stats_local,
+    FEEDBACK_STATS_CACHE_TTL,
+    FEEDBACK_STATS_LOCAL_TTL
+)
+from ...utils.pagination import next_cursor
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def get_feedback_service(db: AsyncSession = Depends(get_db)) -> FeedbackService:
+    """Build the feedback service once per request (no thread-pool hop)"""
+    return FeedbackService(db)
+
+FeedbackSvc = Annotated[FeedbackService, Depends(get_feedback_service)]
+
 @router.get("/", response_model=List[Feedback])
 async def get_feedbacks(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    feedback_service: FeedbackSvc,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip (deprecated, use cursor)", deprecated=True),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     department_id: Optional[int] = Query(None, description="Filter by department ID"),
     patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
     language: Optional[str] = Query(None, description="Filter by language"),
-    status: Optional[str] = Query(None, description="Filter by status"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status"),
     is_urgent: Optional[bool] = Query(None, description="Filter by urgency"),
     min_rating: Optional[float] = Query(None, ge=1, le=5, description="Minimum rating"),
-    max_rating: Optional[float] = Query(None, ge=1, le=5, description="Maximum rating"),
-    db: Session = Depends(get_db)
+    max_rating: Optional[float] = Query(None, ge=1, le=5, description="Maximum rating")
 ):
     """Get all feedbacks with optional filtering"""
     try:
-        feedback_service = FeedbackService(db)
-        
         filters = {}
         if department_id:
             filters['department_id'] = department_id
@@ -38,8 +55,8 @@ async def get_feedbacks(
             filters['patient_id'] = patient_id
         if language:
             filters['language'] = language
-        if status:
-            filters['status'] = status
+        if status_filter:
+            filters['status'] = status_filter
         if is_urgent is not None:
             filters['is_urgent'] = is_urgent
         if min_rating:
@@ -47,17 +64,27 @@ async def get_feedbacks(
         if max_rating:
             filters['max_rating'] = max_rating
             
-        feedbacks = feedback_service.get_feedbacks(
+        feedbacks = await feedback_service.get_feedbacks(
             skip=skip, 
             limit=limit, 
-            filters=filters
+            filters=filters,
+            cursor=cursor
         )
         
-        logger.info(f"Retrieved {len(feedbacks)} feedbacks")
+        cursor_header = next_cursor(feedbacks, limit)
+        if cursor_header:
+            response.headers["X-Next-Cursor"] = cursor_header
+        
+        logger.debug("Retrieved %d feedbacks", len(feedbacks))
         return feedbacks
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error retrieving feedbacks: {str(e)}")
+        logger.error("Error retrieving feedbacks: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving feedbacks"
@@ -65,20 +92,41 @@ async def get_feedbacks(
 
 @router.get("/stats", response_model=FeedbackStats)
 async def get_feedback_stats(
+    feedback_service: FeedbackSvc,
+    response: Response,
     department_id: Optional[int] = Query(None, description="Filter by department ID"),
-    days: int = Query(30, ge=1, le=365, description="Number of days for statistics"),
-    db: Session = Depends(get_db)
+    days: int = Query(30, ge=1, le=365, description="Number of days for statistics")
 ):
-    """Get feedback statistics"""
+    """
+    Get feedback statistics
+
+    Results are cached briefly (in the worker, then in Redis) and dropped
+    whenever a feedback in the department is created, changed or deleted.
+    """
     try:
-        feedback_service = FeedbackService(db)
-        stats = feedback_service.get_feedback_stats(department_id=department_id, days=days)
+        response.headers["Cache-Control"] = f"private, max-age={FEEDBACK_STATS_LOCAL_TTL}"
+        
+        key = feedback_stats_key(department_id)
+        field = feedback_stats_field(days)
+        cached = feedback_stats_local.get((key, field))
+        if cached is not None:
+            return cached
+        
+        cached = await cache.get_hash(key, field)
+        if cached is not None:
+            feedback_stats_local[(key, field)] = cached
+            return cached
+        
+        stats = await feedback_service.get_feedback_stats(department_id=department_id, days=days)
+        payload = stats.model_dump(mode="json")
+        await cache.set_hash(key, {field: payload}, FEEDBACK_STATS_CACHE_TTL)
+        feedback_stats_local[(key, field)] = payload
         
-        logger.info(f"Retrieved feedback statistics for {days} days")
+        logger.debug("Retrieved feedback statistics for %s days", days)
         return stats
         
     except Exception as e:
-        logger.error(f"Error retrieving feedback stats: {str(e)}")
+        logger.error("Error retrieving feedback stats: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving feedback statistics"
@@ -86,194 +134,235 @@ async def get_feedback_stats(
 
 @router.get("/urgent", response_model=List[Feedback])
 async def get_urgent_feedbacks(
-    skip: int = Query(0, ge=0),
+    feedback_service: FeedbackSvc,
+    response: Response,
+    skip: int = Query(0, ge=0, description="Number of records to skip (deprecated, use cursor)", deprecated=True),
     limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page")
 ):
     """Get urgent feedbacks"""
     try:
-        feedback_service = FeedbackService(db)
-        urgent_feedbacks = feedback_service.get_urgent_feedbacks(skip=skip, limit=limit)
+        urgent_feedbacks = await feedback_service.get_urgent_feedbacks(skip=skip, limit=limit, cursor=cursor)
         
-        logger.info(f"Retrieved {len(urgent_feedbacks)} urgent feedbacks")
+        cursor_header = next_cursor(urgent_feedbacks, limit)
+        if cursor_header:
+            response.headers["X-Next-Cursor"] = cursor_header
+        
+        logger.debug("Retrieved %d urgent feedbacks", len(urgent_feedbacks))
         return urgent_feedbacks
         
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error retrieving urgent feedbacks: {str(e)}")
+        logger.error("Error retrieving urgent feedbacks: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving urgent feedbacks"
         )
 
+@router.get("/export")
+async def export_feedbacks(
+    feedback_service: FeedbackSvc,
+    department_id: Optional[int] = Query(None, description="Filter by department ID"),
+    patient_id: Optional[int] = Query(None, description="Filter by patient ID"),
+    status_filter: Optional[str] = Query(None, alias="status", description="Filter by status")
+):
+    """Export feedbacks as newline-delimited JSON, streamed in batches"""
+    filters = {}
+    if department_id:
+        filters['department_id'] = department_id
+    if patient_id:
+        filters['patient_id'] = patient_id
+    if status_filter:
+        filters['status'] = status_filter
+    
+    async def generate():
+        async for feedback in feedback_service.stream_feedbacks(filters=filters):
+            yield Feedback.model_validate(feedback).model_dump_json().encode("utf-8") + b"\n"
+    
+    logger.info("Exporting feedbacks with filters %s", filters)
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
 @router.get("/{feedback_id}", response_model=FeedbackWithAnalysis)
-async def get_feedback(feedback_id: int, db: Session = Depends(get_db)):
+async def get_feedback(feedback_id: int, feedback_service: FeedbackSvc):
     """Get feedback by ID with analysis"""
     try:
-        feedback_service = FeedbackService(db)
-        feedback = feedback_service.get_feedback_with_analysis(feedback_id)
+        feedback = await feedback_service.get_feedback_with_analysis(feedback_id)
         
         if not feedback:
-            logger.warning(f"Feedback {feedback_id} not found")
+            logger.warning("Feedback %s not found", feedback_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Feedback not found"
             )
         
-        logger.info(f"Retrieved feedback {feedback_id}")
+        logger.debug("Retrieved feedback %s", feedback_id)
         return feedback
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving feedback {feedback_id}: {str(e)}")
+        logger.error("Error retrieving feedback %s: %s", feedback_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving feedback"
         )
 
 @router.post("/", response_model=Feedback, status_code=status.HTTP_201_CREATED)
-async def create_feedback(feedback_data: FeedbackCreate, db: Session = Depends(get_db)):
+async def create_feedback(feedback_data: FeedbackCreate, feedback_service: FeedbackSvc):
     """Create new feedback"""
     try:
-        feedback_service = FeedbackService(db)
+        feedback = await feedback_service.create_feedback(feedback_data)
         
-        # Validate patient and department exist
-        if not feedback_service.patient_exists(feedback_data.patient_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Patient not found"
-            )
-            
-        if not feedback_service.department_exists(feedback_data.department_id):
+        logger.info("Created feedback %s", feedback.id)
+        return feedback
+        
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error("Error creating feedback: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error creating feedback"
+        )
+
+@router.post("/bulk", response_model=List[Feedback], status_code=status.HTTP_201_CREATED)
+async def create_feedbacks_bulk(feedbacks_data: List[FeedbackCreate], feedback_service: FeedbackSvc):
+    """Create many feedbacks at once, returned in input order"""
+    try:
+        if len(feedbacks_data) > settings.MAX_PAGE_SIZE:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Department not found"
+                detail=f"Maximum {settings.MAX_PAGE_SIZE} feedbacks per bulk request"
             )
         
-        feedback = feedback_service.create_feedback(feedback_data)
+        feedbacks = await feedback_service.create_feedbacks_bulk(feedbacks_data)
         
-        logger.info(f"Created feedback {feedback.id}")
-        return feedback
+        logger.info("Created %d feedbacks in bulk", len(feedbacks))
+        return feedbacks
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error creating feedback: {str(e)}")
+        logger.error("Error creating feedbacks in bulk: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Error creating feedback"
+            detail="Error creating feedbacks"
         )
 
 @router.put("/{feedback_id}", response_model=Feedback)
 async def update_feedback(
     feedback_id: int, 
     feedback_data: FeedbackUpdate, 
-    db: Session = Depends(get_db)
+    feedback_service: FeedbackSvc
 ):
     """Update feedback"""
     try:
-        feedback_service = FeedbackService(db)
-        
         # Check if feedback exists
-        existing_feedback = feedback_service.get_feedback(feedback_id)
+        existing_feedback = await feedback_service.get_feedback(feedback_id)
         if not existing_feedback:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Feedback not found"
             )
         
-        feedback = feedback_service.update_feedback(feedback_id, feedback_data)
+        feedback = await feedback_service.update_feedback(feedback_id, feedback_data)
         
-        logger.info(f"Updated feedback {feedback_id}")
+        logger.info("Updated feedback %s", feedback_id)
         return feedback
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error updating feedback {feedback_id}: {str(e)}")
+        logger.error("Error updating feedback %s: %s", feedback_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating feedback"
         )
 
 @router.delete("/{feedback_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_feedback(feedback_id: int, db: Session = Depends(get_db)):
+async def delete_feedback(feedback_id: int, feedback_service: FeedbackSvc):
     """Delete feedback"""
     try:
-        feedback_service = FeedbackService(db)
-        
         # Check if feedback exists
-        feedback = feedback_service.get_feedback(feedback_id)
+        feedback = await feedback_service.get_feedback(feedback_id)
         if not feedback:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Feedback not found"
             )
         
-        feedback_service.delete_feedback(feedback_id)
+        await feedback_service.delete_feedback(feedback_id)
         
-        logger.info(f"Deleted feedback {feedback_id}")
+        logger.info("Deleted feedback %s", feedback_id)
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting feedback {feedback_id}: {str(e)}")
+        logger.error("Error deleting feedback %s: %s", feedback_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting feedback"
         )
 
 @router.post("/{feedback_id}/mark-urgent")
-async def mark_feedback_urgent(feedback_id: int, db: Session = Depends(get_db)):
+async def mark_feedback_urgent(feedback_id: int, feedback_service: FeedbackSvc):
     """Mark feedback as urgent"""
     try:
-        feedback_service = FeedbackService(db)
-        
         # Check if feedback exists
-        feedback = feedback_service.get_feedback(feedback_id)
+        feedback = await feedback_service.get_feedback(feedback_id)
         if not feedback:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Feedback not found"
             )
         
-        updated_feedback = feedback_service.mark_urgent(feedback_id)
+        updated_feedback = await feedback_service.mark_urgent(feedback_id)
         
-        logger.info(f"Marked feedback {feedback_id} as urgent")
+        logger.info("Marked feedback %s as urgent", feedback_id)
         return {"message": "Feedback marked as urgent", "feedback": updated_feedback}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error marking feedback {feedback_id} as urgent: {str(e)}")
+        logger.error("Error marking feedback %s as urgent: %s", feedback_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error marking feedback as urgent"
         )
 
 @router.post("/{feedback_id}/resolve")
-async def resolve_feedback(feedback_id: int, db: Session = Depends(get_db)):
+async def resolve_feedback(feedback_id: int, feedback_service: FeedbackSvc):
     """Mark feedback as resolved"""
     try:
-        feedback_service = FeedbackService(db)
-        
         # Check if feedback exists
-        feedback = feedback_service.get_feedback(feedback_id)
+        feedback = await feedback_service.get_feedback(feedback_id)
         if not feedback:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Feedback not found"
             )
         
-        updated_feedback = feedback_service.resolve_feedback(feedback_id)
+        updated_feedback = await feedback_service.resolve_feedback(feedback_id)
         
-        logger.info(f"Resolved feedback {feedback_id}")
+        logger.info("Resolved feedback %s", feedback_id)
         return {"message": "Feedback resolved", "feedback": updated_feedback}
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error resolving feedback {feedback_id}: {str(e)}")
+        logger.error("Error resolving feedback %s: %s", feedback_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error resolving feedback"
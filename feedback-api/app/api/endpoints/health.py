@@ -1,28 +1,39 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import time
 import logging
 
-from ...database.connection import get_db, database
+from ...database.connection import get_db
 from ...config import settings
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+EXPECTED_TABLES = ['patients', 'departments', 'feedbacks', 'feedback_analysis']
+
+# Connectivity ping and schema listing combined to save a round-trip
+DETAILED_CHECK_SQL = text("""
+    SELECT 1 AS ping,
+           (SELECT array_agg(table_name::text)
+            FROM information_schema.tables
+            WHERE table_schema = 'public') AS tables
+""")
+
 @router.get("/health")
 async def health_check():
     """Basic health check endpoint"""
-    return {
+    return ORJSONResponse({
         "status": "healthy",
         "timestamp": time.time(),
         "service": "feedback-api",
         "version": "1.0.0"
-    }
+    })
 
 @router.get("/health/detailed")
-async def detailed_health_check(db: Session = Depends(get_db)):
+async def detailed_health_check(db: AsyncSession = Depends(get_db)):
     """Detailed health check with database connectivity"""
     health_status = {
         "status": "healthy",
@@ -32,33 +43,16 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         "checks": {}
     }
     
-    # Database connectivity check
+    # Database connectivity and schema check in a single round-trip
     try:
-        result = db.execute(text("SELECT 1"))
+        row = (await db.execute(DETAILED_CHECK_SQL)).one()
         health_status["checks"]["database"] = {
             "status": "healthy",
             "response_time": "< 100ms"
         }
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
-        health_status["checks"]["database"] = {
-            "status": "unhealthy",
-            "error": str(e)
-        }
-        health_status["status"] = "unhealthy"
-    
-    # Check database tables
-    try:
-        tables_check = db.execute(text("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_schema = 'public'
-        """)).fetchall()
-        
-        expected_tables = ['patients', 'departments', 'feedbacks', 'feedback_analysis']
-        existing_tables = [row[0] for row in tables_check]
         
-        missing_tables = [table for table in expected_tables if table not in existing_tables]
+        existing_tables = list(row.tables or [])
+        missing_tables = [table for table in EXPECTED_TABLES if table not in existing_tables]
         
         if missing_tables:
             health_status["checks"]["database_schema"] = {
@@ -73,7 +67,11 @@ async def detailed_health_check(db: Session = Depends(get_db)):
             }
             
     except Exception as e:
-        logger.error(f"Database schema check failed: {str(e)}")
+        logger.error("Database health check failed: %s", e)
+        health_status["checks"]["database"] = {
+            "status": "unhealthy",
+            "error": str(e)
+        }
         health_status["checks"]["database_schema"] = {
             "status": "unhealthy",
             "error": str(e)
@@ -87,25 +85,25 @@ async def detailed_health_check(db: Session = Depends(get_db)):
         "environment": settings.ENVIRONMENT
     }
     
-    return health_status
+    return ORJSONResponse(health_status)
 
 @router.get("/health/ready")
-async def readiness_check(db: Session = Depends(get_db)):
+async def readiness_check(db: AsyncSession = Depends(get_db)):
     """Readiness check for Kubernetes/Docker"""
     try:
         # Test database connection
-        db.execute(text("SELECT 1"))
+        await db.execute(text("SELECT 1"))
         
         # Test if we can query main tables
-        db.execute(text("SELECT COUNT(*) FROM departments LIMIT 1"))
+        await db.execute(text("SELECT COUNT(*) FROM departments LIMIT 1"))
         
-        return {
+        return ORJSONResponse({
             "status": "ready",
             "timestamp": time.time()
-        }
+        })
         
     except Exception as e:
-        logger.error(f"Readiness check failed: {str(e)}")
+        logger.error("Readiness check failed: %s", e)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Service not ready"
@@ -114,18 +112,18 @@ async def readiness_check(db: Session = Depends(get_db)):
 @router.get("/health/live")
 async def liveness_check():
     """Liveness check for Kubernetes/Docker"""
-    return {
+    return ORJSONResponse({
         "status": "alive",
         "timestamp": time.time()
-    }
+    })
 
 @router.get("/version")
 async def version_info():
     """Get version information"""
-    return {
+    return ORJSONResponse({
         "service": "feedback-api",
         "version": "1.0.0",
         "build_date": "2025-07-15",
         "environment": settings.ENVIRONMENT,
         "api_version": settings.API_V1_STR
-    }
\ No newline at end of file
+    })
\ No newline at end of file
@@ -1,27 +1,69 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Annotated, Dict, List, Optional
+import hashlib
 import logging
 
+from ...config import settings
 from ...database.connection import get_db
-from ...schemas.patient import Patient, PatientCreate, PatientUpdate, PatientSummary
+from ...schemas.patient import (
+    Patient, PatientCreate, PatientUpdate, PatientSummary, PatientFeedbacksBatch,
+    PatientListAdapter
+)
+from ...schemas._internal import PatientSummaryRowListAdapter
+from ...schemas.feedback import Feedback
 from ...services.patient_service import PatientService
+from ...utils.cache import cache, cache_key, PATIENT_LIST_CACHE_KEY, PATIENT_SUMMARY_CACHE_KEY
+from ...utils.pagination import next_after_id
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def get_patient_service(db: AsyncSession = Depends(get_db)) -> PatientService:
+    """Build the patient service once per request (no thread-pool hop)"""
+    return PatientService(db)
+
+PatientSvc = Annotated[PatientService, Depends(get_patient_service)]
+
+def _page_response(payload: list, limit: int, total: Optional[int] = None) -> ORJSONResponse:
+    """
+    Build a list response from already-serialized items
+
+    The items are the same dicts that go into the cache, so they are
+    encoded once by orjson without a second pass through response_model.
+    The next page's after_id, if any, is exposed in X-Next-Cursor and the
+    total number of matching rows, when known, in X-Total-Count.
+    """
+    response = ORJSONResponse(payload)
+    after_id = next_after_id(payload, limit)
+    if after_id is not None:
+        response.headers["X-Next-Cursor"] = str(after_id)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+    return response
+
+def _patient_etag(patient) -> str:
+    """Strong ETag for a patient, changing whenever the row is updated"""
+    version = patient.updated_at or patient.created_at
+    return '"%s"' % hashlib.md5(f"{patient.id}:{version}".encode()).hexdigest()
+
 @router.get("/", response_model=List[Patient])
 async def get_patients(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    patient_service: PatientSvc,
+    skip: int = Query(0, ge=0, description="Number of records to skip (deprecated, use after_id)", deprecated=True),
     limit: int = Query(100, ge=1, le=1000, description="Number of records to return"),
+    after_id: Optional[int] = Query(None, ge=0, description="Patient id from the X-Next-Cursor header of the previous page"),
     department_id: Optional[int] = Query(None, description="Filter by department ID"),
-    language: Optional[str] = Query(None, description="Filter by preferred language"),
-    db: Session = Depends(get_db)
+    language: Optional[str] = Query(None, description="Filter by preferred language")
 ):
     """Get all patients with optional filtering"""
     try:
-        patient_service = PatientService(db)
+        field = cache_key(skip, limit, after_id, department_id, language)
+        cached = await cache.get_hash(PATIENT_LIST_CACHE_KEY, field)
+        if cached is not None:
+            return _page_response(cached["items"], limit, cached["total"])
         
         filters = {}
         if department_id:
@@ -29,17 +71,24 @@ async def get_patients(
         if language:
             filters['preferred_language'] = language
             
-        patients = patient_service.get_patients(
+        patients, total = await patient_service.get_patients(
             skip=skip, 
             limit=limit, 
-            filters=filters
+            filters=filters,
+            after_id=after_id
+        )
+        
+        payload = PatientListAdapter.dump_python(
+            PatientListAdapter.validate_python(patients, from_attributes=True),
+            mode="json"
         )
+        await cache.set_hash(PATIENT_LIST_CACHE_KEY, {field: {"items": payload, "total": total}}, settings.CACHE_TTL)
         
-        logger.info(f"Retrieved {len(patients)} patients")
-        return patients
+        logger.debug("Retrieved %d patients", len(patients))
+        return _page_response(payload, limit, total)
         
     except Exception as e:
-        logger.error(f"Error retrieving patients: {str(e)}")
+        logger.error("Error retrieving patients: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving patients"
@@ -47,73 +96,105 @@ async def get_patients(
 
 @router.get("/summary", response_model=List[PatientSummary])
 async def get_patients_summary(
-    skip: int = Query(0, ge=0),
+    patient_service: PatientSvc,
+    skip: int = Query(0, ge=0, deprecated=True),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    after_id: Optional[int] = Query(None, ge=0, description="Patient id from the X-Next-Cursor header of the previous page")
 ):
     """Get patients summary with feedback statistics"""
     try:
-        patient_service = PatientService(db)
-        summaries = patient_service.get_patients_summary(skip=skip, limit=limit)
+        field = cache_key(skip, limit, after_id)
+        cached = await cache.get_hash(PATIENT_SUMMARY_CACHE_KEY, field)
+        if cached is not None:
+            return _page_response(cached, limit)
+        
+        summaries = await patient_service.get_patients_summary(skip=skip, limit=limit, after_id=after_id)
+        
+        payload = PatientSummaryRowListAdapter.dump_python(summaries, mode="json")
+        await cache.set_hash(PATIENT_SUMMARY_CACHE_KEY, {field: payload}, settings.CACHE_TTL)
         
-        logger.info(f"Retrieved {len(summaries)} patient summaries")
-        return summaries
+        logger.debug("Retrieved %d patient summaries", len(summaries))
+        return _page_response(payload, limit)
         
     except Exception as e:
-        logger.error(f"Error retrieving patient summaries: {str(e)}")
+        logger.error("Error retrieving patient summaries: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving patient summaries"
         )
 
+@router.post("/feedbacks:batch", response_model=Dict[int, List[Feedback]])
+async def get_patients_feedbacks_batch(batch: PatientFeedbacksBatch, patient_service: PatientSvc):
+    """Get the latest feedbacks of several patients in one request"""
+    try:
+        feedbacks = await patient_service.get_feedbacks_for_patients(
+            batch.patient_ids,
+            limit_per_patient=batch.limit_per_patient
+        )
+        
+        logger.debug("Retrieved feedbacks for %d patients", len(feedbacks))
+        return feedbacks
+        
+    except Exception as e:
+        logger.error("Error retrieving feedbacks for patients: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error retrieving patient feedbacks"
+        )
+
 @router.get("/{patient_id}", response_model=Patient)
-async def get_patient(patient_id: int, db: Session = Depends(get_db)):
-    """Get patient by ID"""
+async def get_patient(patient_id: int, request: Request, response: Response, patient_service: PatientSvc):
+    """
+    Get patient by ID
+
+    Clients that send back the ETag in If-None-Match get an empty 304
+    while the patient is unchanged.
+    """
     try:
-        patient_service = PatientService(db)
-        patient = patient_service.get_patient(patient_id)
+        patient = await patient_service.get_patient(patient_id)
         
         if not patient:
-            logger.warning(f"Patient {patient_id} not found")
+            logger.warning("Patient %s not found", patient_id)
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Patient not found"
             )
         
-        logger.info(f"Retrieved patient {patient_id}")
+        etag = _patient_etag(patient)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = "private, max-age=60"
+        
+        logger.debug("Retrieved patient %s", patient_id)
         return patient
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving patient {patient_id}: {str(e)}")
+        logger.error("Error retrieving patient %s: %s", patient_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving patient"
         )
 
 @router.post("/", response_model=Patient, status_code=status.HTTP_201_CREATED)
-async def create_patient(patient_data: PatientCreate, db: Session = Depends(get_db)):
+async def create_patient(patient_data: PatientCreate, patient_service: PatientSvc):
     """Create new patient"""
     try:
-        patient_service = PatientService(db)
-        
-        # Check if department exists
-        if not patient_service.department_exists(patient_data.department_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Department not found"
-            )
+        patient = await patient_service.create_patient(patient_data)
         
-        patient = patient_service.create_patient(patient_data)
-        
-        logger.info(f"Created patient {patient.id}")
+        logger.info("Created patient %s", patient.id)
         return patient
         
-    except HTTPException:
-        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error creating patient: {str(e)}")
+        logger.error("Error creating patient: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error creating patient"
@@ -123,70 +204,56 @@ async def create_patient(patient_data: PatientCreate, db: Session = Depends(get_
 async def update_patient(
     patient_id: int, 
     patient_data: PatientUpdate, 
-    db: Session = Depends(get_db)
+    patient_service: PatientSvc
 ):
     """Update patient"""
     try:
-        patient_service = PatientService(db)
+        patient = await patient_service.update_patient(patient_id, patient_data)
         
-        # Check if patient exists
-        existing_patient = patient_service.get_patient(patient_id)
-        if not existing_patient:
+        if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Patient not found"
             )
         
-        # Check if department exists (if being updated)
-        if patient_data.department_id and not patient_service.department_exists(patient_data.department_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Department not found"
-            )
-        
-        patient = patient_service.update_patient(patient_id, patient_data)
-        
-        logger.info(f"Updated patient {patient_id}")
+        logger.info("Updated patient %s", patient_id)
         return patient
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error updating patient {patient_id}: {str(e)}")
+        logger.error("Error updating patient %s: %s", patient_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error updating patient"
         )
 
 @router.delete("/{patient_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_patient(patient_id: int, db: Session = Depends(get_db)):
+async def delete_patient(patient_id: int, patient_service: PatientSvc):
     """Delete patient"""
     try:
-        patient_service = PatientService(db)
-        
-        # Check if patient exists
-        patient = patient_service.get_patient(patient_id)
-        if not patient:
+        if not await patient_service.delete_patient(patient_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Patient not found"
             )
         
-        # Check if patient has feedbacks
-        if patient_service.patient_has_feedbacks(patient_id):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot delete patient with existing feedbacks"
-            )
-        
-        patient_service.delete_patient(patient_id)
-        
-        logger.info(f"Deleted patient {patient_id}")
+        logger.info("Deleted patient %s", patient_id)
         
     except HTTPException:
         raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Error deleting patient {patient_id}: {str(e)}")
+        logger.error("Error deleting patient %s: %s", patient_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error deleting patient"
@@ -194,32 +261,30 @@ async def delete_patient(patient_id: int, db: Session = Depends(get_db)):
 
 @router.get("/{patient_id}/feedbacks")
 async def get_patient_feedbacks(
+    patient_service: PatientSvc,
     patient_id: int,
     skip: int = Query(0, ge=0),
-    limit: int = Query(50, ge=1, le=200),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200)
 ):
     """Get feedbacks for a specific patient"""
     try:
-        patient_service = PatientService(db)
-        
         # Check if patient exists
-        patient = patient_service.get_patient(patient_id)
+        patient = await patient_service.get_patient(patient_id)
         if not patient:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Patient not found"
             )
         
-        feedbacks = patient_service.get_patient_feedbacks(patient_id, skip=skip, limit=limit)
+        feedbacks = await patient_service.get_patient_feedbacks(patient_id, skip=skip, limit=limit)
         
-        logger.info(f"Retrieved {len(feedbacks)} feedbacks for patient {patient_id}")
+        logger.debug("Retrieved %d feedbacks for patient %s", len(feedbacks), patient_id)
         return feedbacks
         
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error retrieving feedbacks for patient {patient_id}: {str(e)}")
+        logger.error("Error retrieving feedbacks for patient %s: %s", patient_id, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Error retrieving patient feedbacks"
@@ -10,12 +10,12 @@ Components:
 - Database utilities and helpers
 """
 
+from sqlalchemy import text
+
 from .connection import (
-    database,
     engine,
-    SessionLocal,
+    AsyncSessionLocal,
     get_db,
-    get_database,
     check_database_connection
 )
 from .models import (
@@ -31,11 +31,9 @@ from .models import (
 
 __all__ = [
     # Connection components
-    "database",
     "engine", 
-    "SessionLocal",
+    "AsyncSessionLocal",
     "get_db",
-    "get_database",
     "check_database_connection",
     
     # Model components
@@ -64,8 +62,16 @@ REQUIRED_TABLES = [
 # Database utilities
 async def init_database():
     """Initialize database connection"""
-    await database.connect()
+    return await check_database_connection()
 
 async def close_database():
     """Close database connection"""
-    await database.disconnect()
\ No newline at end of file
+    await engine.dispose()
+
+async def create_tables():
+    """Create any missing tables (run once per deploy, not per worker)"""
+    async with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            # Trigram indexes on patient names/email
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all)
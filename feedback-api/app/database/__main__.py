@@ -0,0 +1,18 @@
+"""
+Create the database schema
+
+Run once before starting the API workers:
+
+    python -m app.database
+"""
+
+import asyncio
+
+from . import create_tables, close_database
+
+async def main():
+    await create_tables()
+    await close_database()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,6 @@
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.orm import sessionmaker
-from databases import Database
+from sqlalchemy import MetaData, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import AsyncIterator
 import logging
 
 from ..config import settings
@@ -10,44 +10,54 @@ logger = logging.getLogger(__name__)
 # Database URL
 DATABASE_URL = settings.DATABASE_URL
 
-# SQLAlchemy engine
-engine = create_engine(
-    DATABASE_URL,
+# The ORM runs on asyncpg; settings keep the plain postgresql:// form
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://", 1)
+
+# SQLAlchemy async engine, the only connection pool in the service. Bursts
+# above pool_size borrow overflow connections; beyond that requests fail
+# fast after pool_timeout instead of queueing indefinitely.
+# Statements are compiled once into SQLAlchemy's query cache and prepared
+# once per connection by asyncpg, so hot point lookups skip both the
+# compiler and the Postgres parser/planner.
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
-    pool_size=20,
-    max_overflow=0,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_timeout=5,
+    query_cache_size=1200,
+    connect_args={
+        "prepared_statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE,
+        "statement_cache_size": settings.DATABASE_STATEMENT_CACHE_SIZE
+    },
     echo=settings.DATABASE_ECHO
 )
 
-# Session maker
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Async database instance
-database = Database(DATABASE_URL)
+# Session maker (objects stay usable after commit, so responses can be
+# serialized without reloading them)
+AsyncSessionLocal = async_sessionmaker(
+    engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 # Metadata
 metadata = MetaData()
 
-def get_database():
-    """Get database connection"""
-    return database
-
-def get_db():
+async def get_db() -> AsyncIterator[AsyncSession]:
     """Get database session for dependency injection"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 async def check_database_connection():
     """Check database connection"""
     try:
-        await database.connect()
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         logger.info("Database connection successful")
-        await database.disconnect()
         return True
     except Exception as e:
-        logger.error(f"Database connection failed: {e}")
-        return False
\ No newline at end of file
+        logger.error("Database connection failed: %s", e)
+        return False
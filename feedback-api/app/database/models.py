@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, ForeignKey, Boolean, Index, JSON, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -23,6 +24,19 @@ class Department(Base):
 class Patient(Base):
     """Patient model"""
     __tablename__ = "patients"
+    __table_args__ = (
+        # Listing filters: department alone or department + language
+        Index("idx_patients_department_language", "department_id", "preferred_language"),
+        # Substring search (ILIKE '%term%'); needs the pg_trgm extension
+        *(
+            Index(
+                f"idx_patients_{column}_trgm", column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"}
+            )
+            for column in ("first_name", "last_name", "email")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String(50), nullable=False, index=True)
@@ -42,6 +56,23 @@ class Patient(Base):
 class Feedback(Base):
     """Feedback model"""
     __tablename__ = "feedbacks"
+    __table_args__ = (
+        # Keyset pagination (ORDER BY created_at DESC, id DESC scans it backwards)
+        Index("idx_feedbacks_created_at_id", "created_at", "id"),
+        # A patient's feedbacks by recency, and the per-patient summary
+        # aggregate, served from the index alone
+        Index(
+            "idx_feedbacks_patient_created_at", "patient_id", "created_at",
+            postgresql_include=["rating", "status"]
+        ),
+        # Department listings and stats in keyset order
+        Index("idx_feedbacks_department_created_at_id", "department_id", "created_at", "id"),
+        # Urgent queue; only the (few) urgent rows are indexed
+        Index(
+            "idx_feedbacks_urgent_created_at_id", "created_at", "id",
+            postgresql_where=text("is_urgent")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     patient_id = Column(Integer, ForeignKey("patients.id"), nullable=False)
@@ -64,13 +95,17 @@ class Feedback(Base):
 class FeedbackAnalysis(Base):
     """Feedback analysis model for NLP results"""
     __tablename__ = "feedback_analysis"
+    __table_args__ = (
+        # Containment queries on themes (themes @> '["wait_time"]')
+        Index("idx_feedback_analysis_themes", "themes", postgresql_using="gin"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     feedback_id = Column(Integer, ForeignKey("feedbacks.id"), unique=True, nullable=False)
     sentiment = Column(String(20), index=True)  # positive, negative, neutral
     sentiment_score = Column(Float)  # -1 to 1
-    themes = Column(Text)  # JSON array of detected themes
-    keywords = Column(Text)  # JSON array of important keywords
+    themes = Column(JSON().with_variant(JSONB, "postgresql"))  # array of detected themes
+    keywords = Column(JSON().with_variant(JSONB, "postgresql"))  # array of important keywords
     urgency_score = Column(Float, default=0.0, index=True)  # 0-1
     confidence_score = Column(Float)  # 0-1
     processed_at = Column(DateTime(timezone=True), server_default=func.now())
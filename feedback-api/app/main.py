@@ -1,14 +1,17 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
 
 from .config import settings
-from .database.connection import database, engine
-from .database.models import Base
+from .database.connection import engine
 from .api.endpoints import patients, feedbacks, departments, health
-from .utils.logger import setup_logger
+from .utils.cache import cache
+from .utils.logger import setup_logger, log_api_request
 
 # Setup logging
 logger = setup_logger(__name__)
@@ -17,27 +20,30 @@ logger = setup_logger(__name__)
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Feedback API")
-    
-    # Create database tables
-    Base.metadata.create_all(bind=engine)
-    logger.info("Database tables created")
-    
-    # Connect to database
-    await database.connect()
-    logger.info("Connected to database")
+    await cache.connect()
     
     yield
     
-    # Shutdown
-    await database.disconnect()
-    logger.info("Disconnected from database")
+    # Shutdown: close the database and Redis pools concurrently, so a slow
+    # one doesn't delay the other and one failure doesn't hide the other
+    results = await asyncio.gather(
+        engine.dispose(),
+        cache.close(),
+        return_exceptions=True
+    )
+    for name, result in zip(("database", "Redis"), results):
+        if isinstance(result, Exception):
+            logger.error("Error closing %s connections: %s", name, result)
+    if not isinstance(results[0], Exception):
+        logger.info("Disconnected from database")
 
 # FastAPI app
 app = FastAPI(
     title="DGH Feedback API",
     description="Patient Feedback Management API for Douala General Hospital",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -49,6 +55,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies (patient and feedback lists); small responses are
+# sent as-is since gzip would not pay for itself
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Structured access log, one line per request (uvicorn's access log is disabled)
+@app.middleware("http")
+async def log_requests(request: Request, call_next):
+    start_time = time.perf_counter()
+    response = await call_next(request)
+    
+    if logger.isEnabledFor(logging.INFO):
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        log_api_request(logger, request.method, request.url.path, response.status_code, round(duration_ms, 2))
+    
+    return response
+
 # Include routers
 app.include_router(health.router, tags=["Health"])
 app.include_router(
@@ -96,5 +118,6 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=False,
-        log_level="info"
+        log_level="info",
+        access_log=False
     )
\ No newline at end of file
@@ -16,7 +16,8 @@ from .patient import (
     PatientCreate,
     PatientUpdate,
     PatientSummary,
-    PatientWithFeedbacks
+    PatientWithFeedbacks,
+    PatientFeedbacksBatch
 )
 from .feedback import (
     Feedback,
@@ -41,6 +42,7 @@ __all__ = [
     "PatientUpdate",
     "PatientSummary",
     "PatientWithFeedbacks",
+    "PatientFeedbacksBatch",
     
     # Feedback schemas
     "Feedback",
@@ -58,9 +60,9 @@ __all__ = [
     "DepartmentUpdate",
 ]
 
-# Schema validation settings
+# Schema validation settings (validation happens on construction only;
+# response schemas are frozen instead of re-validated on assignment)
 VALIDATION_CONFIG = {
-    "validate_assignment": True,
     "use_enum_values": True,
     "extra": "forbid"
 }
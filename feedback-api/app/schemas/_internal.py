@@ -0,0 +1,27 @@
+"""
+Internal transfer objects
+
+Plain slotted dataclasses for rows that are built server-side from trusted
+database results and never validated. The public Pydantic schemas still
+describe them in the API (response_model).
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+from pydantic import TypeAdapter
+
+@dataclass(slots=True, frozen=True)
+class PatientSummaryRow:
+    """One row of the patients summary, shaped like schemas.patient.PatientSummary"""
+    id: int
+    first_name: str
+    last_name: str
+    preferred_language: str
+    department_id: int
+    department_name: Optional[str] = None
+    total_feedbacks: int = 0
+    avg_rating: Optional[float] = None
+
+# Dumps a page of rows to JSON-ready dicts in one pydantic-core call
+PatientSummaryRowListAdapter = TypeAdapter(List[PatientSummaryRow])
@@ -1,23 +1,15 @@
-from pydantic import BaseModel, validator
-from typing import Optional
+from pydantic import BaseModel, StringConstraints
+from typing import Annotated, Optional
 from datetime import datetime
 
+# Constraints run in pydantic-core rather than Python validators
+DepartmentName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=2, max_length=100)]
+DepartmentCode = Annotated[str, StringConstraints(strip_whitespace=True, to_upper=True, min_length=2, max_length=10)]
+
 class DepartmentBase(BaseModel):
     """Base department schema"""
-    name: str
-    code: str
-
-    @validator('name')
-    def validate_name(cls, v):
-        if not v or len(v.strip()) < 2:
-            raise ValueError('Department name must be at least 2 characters long')
-        return v.strip()
-
-    @validator('code')
-    def validate_code(cls, v):
-        if not v or len(v.strip()) < 2:
-            raise ValueError('Department code must be at least 2 characters long')
-        return v.strip().upper()
+    name: DepartmentName
+    code: DepartmentCode
 
 class DepartmentCreate(DepartmentBase):
     """Department creation schema"""
@@ -25,20 +17,8 @@ class DepartmentCreate(DepartmentBase):
 
 class DepartmentUpdate(BaseModel):
     """Department update schema"""
-    name: Optional[str] = None
-    code: Optional[str] = None
-
-    @validator('name')
-    def validate_name(cls, v):
-        if v is not None and (not v or len(v.strip()) < 2):
-            raise ValueError('Department name must be at least 2 characters long')
-        return v.strip() if v else v
-
-    @validator('code')
-    def validate_code(cls, v):
-        if v is not None and (not v or len(v.strip()) < 2):
-            raise ValueError('Department code must be at least 2 characters long')
-        return v.strip().upper() if v else v
+    name: Optional[DepartmentName] = None
+    code: Optional[DepartmentCode] = None
 
 class Department(DepartmentBase):
     """Department response schema"""
@@ -47,4 +27,5 @@ class Department(DepartmentBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+        frozen = True
\ No newline at end of file
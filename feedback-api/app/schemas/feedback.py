@@ -1,41 +1,23 @@
-from pydantic import BaseModel, validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, StringConstraints
+from typing import Annotated, Literal, Optional, List
 from datetime import datetime
 
+# Constraints run in pydantic-core rather than Python validators
+Rating = Annotated[float, Field(ge=1, le=5)]
+Minutes = Annotated[float, Field(ge=0)]
+FeedbackText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=10)]
+FeedbackLanguage = Literal['fr', 'en', 'douala', 'bassa', 'ewondo']
+FeedbackStatus = Literal['pending', 'reviewed', 'resolved']
+
 class FeedbackBase(BaseModel):
     """Base feedback schema"""
     patient_id: int
     department_id: int
-    rating: float
-    feedback_text: str
-    language: str
-    wait_time_min: Optional[float] = None
-    resolution_time_min: Optional[float] = None
-
-    @validator('rating')
-    def validate_rating(cls, v):
-        if not 1 <= v <= 5:
-            raise ValueError('Rating must be between 1 and 5')
-        return v
-
-    @validator('language')
-    def validate_language(cls, v):
-        allowed_languages = ['fr', 'en', 'douala', 'bassa', 'ewondo']
-        if v not in allowed_languages:
-            raise ValueError(f'Language must be one of: {allowed_languages}')
-        return v
-
-    @validator('feedback_text')
-    def validate_feedback_text(cls, v):
-        if not v or len(v.strip()) < 10:
-            raise ValueError('Feedback text must be at least 10 characters long')
-        return v.strip()
-
-    @validator('wait_time_min', 'resolution_time_min')
-    def validate_times(cls, v):
-        if v is not None and v < 0:
-            raise ValueError('Time values must be positive')
-        return v
+    rating: Rating
+    feedback_text: FeedbackText
+    language: FeedbackLanguage
+    wait_time_min: Optional[Minutes] = None
+    resolution_time_min: Optional[Minutes] = None
 
 class FeedbackCreate(FeedbackBase):
     """Feedback creation schema"""
@@ -43,25 +25,11 @@ class FeedbackCreate(FeedbackBase):
 
 class FeedbackUpdate(BaseModel):
     """Feedback update schema"""
-    rating: Optional[float] = None
+    rating: Optional[Rating] = None
     feedback_text: Optional[str] = None
     wait_time_min: Optional[float] = None
     resolution_time_min: Optional[float] = None
-    status: Optional[str] = None
-
-    @validator('rating')
-    def validate_rating(cls, v):
-        if v is not None and not 1 <= v <= 5:
-            raise ValueError('Rating must be between 1 and 5')
-        return v
-
-    @validator('status')
-    def validate_status(cls, v):
-        if v is not None:
-            allowed_statuses = ['pending', 'reviewed', 'resolved']
-            if v not in allowed_statuses:
-                raise ValueError(f'Status must be one of: {allowed_statuses}')
-        return v
+    status: Optional[FeedbackStatus] = None
 
 class Feedback(FeedbackBase):
     """Feedback response schema"""
@@ -73,6 +41,7 @@ class Feedback(FeedbackBase):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 class FeedbackWithAnalysis(Feedback):
     """Feedback with analysis schema"""
@@ -80,6 +49,7 @@ class FeedbackWithAnalysis(Feedback):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 class FeedbackSummary(BaseModel):
     """Feedback summary schema"""
@@ -92,13 +62,14 @@ class FeedbackSummary(BaseModel):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 class FeedbackAnalysisBase(BaseModel):
     """Base feedback analysis schema"""
     sentiment: Optional[str] = None
     sentiment_score: Optional[float] = None
-    themes: Optional[str] = None  # JSON string
-    keywords: Optional[str] = None  # JSON string
+    themes: Optional[List[str]] = None
+    keywords: Optional[List[str]] = None
     urgency_score: float = 0.0
     confidence_score: Optional[float] = None
 
@@ -114,6 +85,7 @@ class FeedbackAnalysis(FeedbackAnalysisBase):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 class FeedbackStats(BaseModel):
     """Feedback statistics schema"""
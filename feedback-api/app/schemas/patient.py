@@ -1,29 +1,20 @@
-from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from pydantic import AfterValidator, BaseModel, EmailStr, Field, StringConstraints, TypeAdapter
+from typing import Annotated, Literal, Optional, List
 from datetime import datetime
 
+# Constraints run in pydantic-core rather than Python validators
+PatientName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=2), AfterValidator(str.title)]
+PatientLanguage = Literal['fr', 'en', 'douala', 'bassa', 'ewondo']
+
 class PatientBase(BaseModel):
     """Base patient schema"""
-    first_name: str
-    last_name: str
+    first_name: PatientName
+    last_name: PatientName
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
-    preferred_language: str = "fr"
+    preferred_language: PatientLanguage = "fr"
     department_id: int
 
-    @validator('preferred_language')
-    def validate_language(cls, v):
-        allowed_languages = ['fr', 'en', 'douala', 'bassa', 'ewondo']
-        if v not in allowed_languages:
-            raise ValueError(f'Language must be one of: {allowed_languages}')
-        return v
-
-    @validator('first_name', 'last_name')
-    def validate_names(cls, v):
-        if not v or len(v.strip()) < 2:
-            raise ValueError('Name must be at least 2 characters long')
-        return v.strip().title()
-
 class PatientCreate(PatientBase):
     """Patient creation schema"""
     pass
@@ -34,17 +25,9 @@ class PatientUpdate(BaseModel):
     last_name: Optional[str] = None
     phone: Optional[str] = None
     email: Optional[EmailStr] = None
-    preferred_language: Optional[str] = None
+    preferred_language: Optional[PatientLanguage] = None
     department_id: Optional[int] = None
 
-    @validator('preferred_language')
-    def validate_language(cls, v):
-        if v is not None:
-            allowed_languages = ['fr', 'en', 'douala', 'bassa', 'ewondo']
-            if v not in allowed_languages:
-                raise ValueError(f'Language must be one of: {allowed_languages}')
-        return v
-
 class Patient(PatientBase):
     """Patient response schema"""
     id: int
@@ -53,6 +36,7 @@ class Patient(PatientBase):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 class PatientWithFeedbacks(Patient):
     """Patient with feedbacks schema"""
@@ -60,6 +44,7 @@ class PatientWithFeedbacks(Patient):
 
     class Config:
         from_attributes = True
+        frozen = True
 
 class PatientSummary(BaseModel):
     """Patient summary schema"""
@@ -68,12 +53,22 @@ class PatientSummary(BaseModel):
     last_name: str
     preferred_language: str
     department_id: int
+    department_name: Optional[str] = None
     total_feedbacks: int = 0
     avg_rating: Optional[float] = None
 
     class Config:
         from_attributes = True
+        frozen = True
+
+class PatientFeedbacksBatch(BaseModel):
+    """Request for the latest feedbacks of several patients at once"""
+    patient_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    limit_per_patient: int = Field(50, ge=1, le=200)
 
 # Forward reference resolution
 from .feedback import FeedbackSummary
-PatientWithFeedbacks.model_rebuild()
\ No newline at end of file
+PatientWithFeedbacks.model_rebuild()
+
+# Built once; validate/dump whole pages in a single pydantic-core call
+PatientListAdapter = TypeAdapter(List[Patient])
@@ -1,73 +1,200 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, exists, func, case, and_, desc, tuple_, insert
+from sqlalchemy.orm import joinedload, raiseload
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, AsyncIterator, Iterable, Set
 from datetime import datetime, timedelta
 import logging
+import re
 
 from ..database.models import Feedback, Patient, Department, FeedbackAnalysis
 from ..schemas.feedback import FeedbackCreate, FeedbackUpdate, FeedbackStats
+from ..utils.cache import (
+    department_cache, remember_department, invalidate_patient_summaries, invalidate_feedback_stats
+)
+from ..utils.pagination import decode_cursor
 
 logger = logging.getLogger(__name__)
 
+# Urgent keywords, matched anywhere in the text (case-insensitive) in a
+# single pass
+_URGENT_KEYWORDS_RE = re.compile(
+    "|".join([
+        'urgent', 'emergency', 'pain', 'douleur', 'urgence',
+        'terrible', 'awful', 'horrible', 'disaster', 'catastrophe',
+        'unacceptable', 'inacceptable', 'worst', 'pire'
+    ]),
+    re.IGNORECASE
+)
+
+# Listing filters by name. Values are always bound parameters, so queries
+# with the same set of filters share one compiled statement.
+_EQ_FILTERS = {
+    'department_id': Feedback.department_id,
+    'patient_id': Feedback.patient_id,
+    'language': Feedback.language,
+    'status': Feedback.status,
+    'is_urgent': Feedback.is_urgent
+}
+_RANGE_FILTERS = {
+    'min_rating': Feedback.rating.__ge__,
+    'max_rating': Feedback.rating.__le__
+}
+
+def _filter_conditions(filters: Dict[str, Any]) -> List[Any]:
+    """WHERE conditions for the filters present in filters"""
+    conditions = [column == filters[name] for name, column in _EQ_FILTERS.items() if name in filters]
+    conditions.extend(op(filters[name]) for name, op in _RANGE_FILTERS.items() if name in filters)
+    return conditions
+
 class FeedbackService:
     """Service class for feedback operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_feedbacks(
+    async def get_feedbacks(
         self, 
         skip: int = 0, 
         limit: int = 100, 
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None
     ) -> List[Feedback]:
-        """Get feedbacks with optional filtering"""
-        query = self.db.query(Feedback)
+        """
+        Get feedbacks with optional filtering
+
+        When a cursor is given, pages with a keyset seek on (created_at, id)
+        instead of OFFSET, and skip is ignored.
+
+        The Feedback schema only reads columns; raiseload turns any
+        accidental per-row relationship load (N+1) into an error.
+        """
+        query = self._apply_filters(select(Feedback).options(raiseload("*")), filters)
         
+        query = query.order_by(desc(Feedback.created_at), desc(Feedback.id))
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            query = query.where(
+                tuple_(Feedback.created_at, Feedback.id) < (cursor_created_at, cursor_id)
+            )
+        else:
+            query = query.offset(skip)
+        
+        return (await self.db.scalars(query.limit(limit))).all()
+    
+    async def stream_feedbacks(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        batch_size: int = 200
+    ) -> AsyncIterator[Feedback]:
+        """Iterate over all matching feedbacks, fetching batch_size rows at a time"""
+        query = self._apply_filters(select(Feedback).options(raiseload("*")), filters)
+        query = query.order_by(desc(Feedback.created_at), desc(Feedback.id))
+        
+        result = await self.db.stream_scalars(query.execution_options(yield_per=batch_size))
+        async for feedback in result:
+            yield feedback
+    
+    def _apply_filters(self, query, filters: Optional[Dict[str, Any]] = None):
+        """Apply listing filters to a feedback query"""
         if filters:
-            if 'department_id' in filters:
-                query = query.filter(Feedback.department_id == filters['department_id'])
-            if 'patient_id' in filters:
-                query = query.filter(Feedback.patient_id == filters['patient_id'])
-            if 'language' in filters:
-                query = query.filter(Feedback.language == filters['language'])
-            if 'status' in filters:
-                query = query.filter(Feedback.status == filters['status'])
-            if 'is_urgent' in filters:
-                query = query.filter(Feedback.is_urgent == filters['is_urgent'])
-            if 'min_rating' in filters:
-                query = query.filter(Feedback.rating >= filters['min_rating'])
-            if 'max_rating' in filters:
-                query = query.filter(Feedback.rating <= filters['max_rating'])
-        
-        return query.order_by(desc(Feedback.created_at)).offset(skip).limit(limit).all()
-    
-    def get_feedback(self, feedback_id: int) -> Optional[Feedback]:
+            query = query.where(*_filter_conditions(filters))
+        
+        return query
+    
+    async def get_feedback(self, feedback_id: int) -> Optional[Feedback]:
         """Get feedback by ID"""
-        return self.db.query(Feedback).filter(Feedback.id == feedback_id).first()
+        return await self.db.get(Feedback, feedback_id)
     
-    def get_feedback_with_analysis(self, feedback_id: int) -> Optional[Feedback]:
+    async def get_feedback_with_analysis(self, feedback_id: int) -> Optional[Feedback]:
         """Get feedback by ID with analysis data"""
-        return self.db.query(Feedback).filter(Feedback.id == feedback_id).first()
+        # AsyncSession can't lazy-load, so join the analysis into the same query
+        return await self.db.scalar(
+            select(Feedback)
+            .options(joinedload(Feedback.analysis))
+            .where(Feedback.id == feedback_id)
+        )
     
-    def create_feedback(self, feedback_data: FeedbackCreate) -> Feedback:
-        """Create new feedback"""
-        db_feedback = Feedback(**feedback_data.model_dump())
+    async def create_feedback(self, feedback_data: FeedbackCreate) -> Feedback:
+        """
+        Create new feedback
+
+        The patient and department are validated by their foreign keys
+        rather than separate lookups, and the row is written and read back
+        with a single INSERT ... RETURNING.
+
+        Raises:
+            ValueError: If the patient or department does not exist
+        """
+        row = feedback_data.model_dump()
         
         # Auto-detect urgency based on rating and keywords
         urgency_score = self._calculate_urgency(feedback_data.feedback_text, feedback_data.rating)
-        db_feedback.is_urgent = urgency_score > 0.7
+        row['is_urgent'] = urgency_score > 0.7
         
-        self.db.add(db_feedback)
-        self.db.commit()
-        self.db.refresh(db_feedback)
+        try:
+            db_feedback = await self.db.scalar(insert(Feedback).values(**row).returning(Feedback))
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Patient or department not found")
+        await invalidate_patient_summaries()
+        await invalidate_feedback_stats(db_feedback.department_id)
         
-        logger.info(f"Created feedback {db_feedback.id} for patient {feedback_data.patient_id}")
+        logger.info("Created feedback %s for patient %s", db_feedback.id, feedback_data.patient_id)
         return db_feedback
     
-    def update_feedback(self, feedback_id: int, feedback_data: FeedbackUpdate) -> Feedback:
+    async def create_feedbacks_bulk(self, feedbacks_data: List[FeedbackCreate]) -> List[Feedback]:
+        """
+        Create many feedbacks in one transaction
+
+        Patient and department references are validated with one query each,
+        then all rows are inserted with a single INSERT ... RETURNING.
+
+        Raises:
+            ValueError: If any referenced patient or department does not exist
+        """
+        if not feedbacks_data:
+            return []
+        
+        patient_ids = {f.patient_id for f in feedbacks_data}
+        department_ids = {f.department_id for f in feedbacks_data}
+        
+        missing_patients = patient_ids - await self.patients_exist(patient_ids)
+        if missing_patients:
+            raise ValueError(f"Patients not found: {sorted(missing_patients)}")
+        
+        missing_departments = department_ids - await self.departments_exist(department_ids)
+        if missing_departments:
+            raise ValueError(f"Departments not found: {sorted(missing_departments)}")
+        
+        rows = []
+        for feedback_data in feedbacks_data:
+            row = feedback_data.model_dump()
+            row['is_urgent'] = self._calculate_urgency(feedback_data.feedback_text, feedback_data.rating) > 0.7
+            rows.append(row)
+        
+        # The existence checks above can race a concurrent delete (and the
+        # department check may come from a stale cache): the foreign keys
+        # have the final say
+        try:
+            created = (await self.db.scalars(
+                insert(Feedback).returning(Feedback, sort_by_parameter_order=True),
+                rows
+            )).all()
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Patient or department not found")
+        await invalidate_patient_summaries()
+        await invalidate_feedback_stats(*department_ids)
+        
+        logger.info("Created %d feedbacks in bulk", len(created))
+        return created
+    
+    async def update_feedback(self, feedback_id: int, feedback_data: FeedbackUpdate) -> Feedback:
         """Update feedback"""
-        db_feedback = self.get_feedback(feedback_id)
+        db_feedback = await self.get_feedback(feedback_id)
         if not db_feedback:
             raise ValueError("Feedback not found")
         
@@ -75,73 +202,93 @@ class FeedbackService:
         for field, value in update_data.items():
             setattr(db_feedback, field, value)
         
-        self.db.commit()
-        self.db.refresh(db_feedback)
+        await self.db.commit()
+        await self.db.refresh(db_feedback)
+        await invalidate_patient_summaries()
+        await invalidate_feedback_stats(db_feedback.department_id)
         
-        logger.info(f"Updated feedback {feedback_id}")
+        logger.info("Updated feedback %s", feedback_id)
         return db_feedback
     
-    def delete_feedback(self, feedback_id: int) -> bool:
+    async def delete_feedback(self, feedback_id: int) -> bool:
         """Delete feedback"""
-        db_feedback = self.get_feedback(feedback_id)
+        db_feedback = await self.get_feedback(feedback_id)
         if not db_feedback:
             return False
         
         # Delete associated analysis first
-        self.db.query(FeedbackAnalysis).filter(
-            FeedbackAnalysis.feedback_id == feedback_id
-        ).delete()
+        await self.db.execute(
+            delete(FeedbackAnalysis).where(FeedbackAnalysis.feedback_id == feedback_id)
+        )
         
-        self.db.delete(db_feedback)
-        self.db.commit()
+        await self.db.delete(db_feedback)
+        await self.db.commit()
+        await invalidate_patient_summaries()
+        await invalidate_feedback_stats(db_feedback.department_id)
         
-        logger.info(f"Deleted feedback {feedback_id}")
+        logger.info("Deleted feedback %s", feedback_id)
         return True
     
-    def get_urgent_feedbacks(self, skip: int = 0, limit: int = 50) -> List[Feedback]:
-        """Get urgent feedbacks"""
-        return self.db.query(Feedback).filter(
-            Feedback.is_urgent == True
-        ).order_by(desc(Feedback.created_at)).offset(skip).limit(limit).all()
+    async def get_urgent_feedbacks(
+        self, 
+        skip: int = 0, 
+        limit: int = 50, 
+        cursor: Optional[str] = None
+    ) -> List[Feedback]:
+        """Get urgent feedbacks, newest first, with the same keyset paging as get_feedbacks"""
+        return await self.get_feedbacks(skip=skip, limit=limit, filters={'is_urgent': True}, cursor=cursor)
     
-    def mark_urgent(self, feedback_id: int) -> Feedback:
+    async def mark_urgent(self, feedback_id: int) -> Feedback:
         """Mark feedback as urgent"""
-        db_feedback = self.get_feedback(feedback_id)
+        db_feedback = await self.get_feedback(feedback_id)
         if not db_feedback:
             raise ValueError("Feedback not found")
         
         db_feedback.is_urgent = True
-        self.db.commit()
-        self.db.refresh(db_feedback)
+        await self.db.commit()
+        await self.db.refresh(db_feedback)
+        await invalidate_feedback_stats(db_feedback.department_id)
         
-        logger.info(f"Marked feedback {feedback_id} as urgent")
+        logger.info("Marked feedback %s as urgent", feedback_id)
         return db_feedback
     
-    def resolve_feedback(self, feedback_id: int) -> Feedback:
+    async def resolve_feedback(self, feedback_id: int) -> Feedback:
         """Mark feedback as resolved"""
-        db_feedback = self.get_feedback(feedback_id)
+        db_feedback = await self.get_feedback(feedback_id)
         if not db_feedback:
             raise ValueError("Feedback not found")
         
         db_feedback.status = "resolved"
-        self.db.commit()
-        self.db.refresh(db_feedback)
+        await self.db.commit()
+        await self.db.refresh(db_feedback)
         
-        logger.info(f"Resolved feedback {feedback_id}")
+        logger.info("Resolved feedback %s", feedback_id)
         return db_feedback
     
-    def get_feedback_stats(self, department_id: Optional[int] = None, days: int = 30) -> FeedbackStats:
-        """Get feedback statistics"""
-        start_date = datetime.utcnow() - timedelta(days=days)
+    async def get_feedback_stats(self, department_id: Optional[int] = None, days: int = 30) -> FeedbackStats:
+        """
+        Get feedback statistics
+
+        Every figure is aggregated in SQL, so only one row per department,
+        language and day comes back instead of every feedback in the window.
+        """
+        now = datetime.utcnow()
+        start_date = now - timedelta(days=days)
         
-        # Base query
-        query = self.db.query(Feedback).filter(Feedback.created_at >= start_date)
+        conditions = [Feedback.created_at >= start_date]
         if department_id:
-            query = query.filter(Feedback.department_id == department_id)
+            conditions.append(Feedback.department_id == department_id)
         
-        feedbacks = query.all()
+        totals = (await self.db.execute(
+            select(
+                func.count(),
+                func.avg(Feedback.rating),
+                func.count(case((Feedback.is_urgent == True, 1)))
+            ).where(*conditions)
+        )).one()
+        total_feedbacks, avg_rating, urgent_count = totals
         
-        if not feedbacks:
+        if not total_feedbacks:
             return FeedbackStats(
                 total_feedbacks=0,
                 avg_rating=0.0,
@@ -152,50 +299,49 @@ class FeedbackService:
                 recent_trend=[]
             )
         
-        # Calculate statistics
-        total_feedbacks = len(feedbacks)
-        avg_rating = sum(f.rating for f in feedbacks) / total_feedbacks
-        urgent_count = sum(1 for f in feedbacks if f.is_urgent)
-        
         # Department distribution
-        dept_stats = {}
-        for feedback in feedbacks:
-            dept_id = feedback.department_id
-            if dept_id not in dept_stats:
-                dept_stats[dept_id] = {'count': 0, 'avg_rating': 0}
-            dept_stats[dept_id]['count'] += 1
-        
-        # Calculate average ratings per department
-        for dept_id in dept_stats:
-            dept_feedbacks = [f for f in feedbacks if f.department_id == dept_id]
-            dept_stats[dept_id]['avg_rating'] = sum(f.rating for f in dept_feedbacks) / len(dept_feedbacks)
+        dept_rows = await self.db.execute(
+            select(Feedback.department_id, func.count(), func.avg(Feedback.rating))
+            .where(*conditions)
+            .group_by(Feedback.department_id)
+        )
+        dept_stats = {
+            dept_id: {'count': count, 'avg_rating': float(dept_avg)}
+            for dept_id, count, dept_avg in dept_rows
+        }
         
         # Language distribution
-        lang_stats = {}
-        for feedback in feedbacks:
-            lang = feedback.language
-            if lang not in lang_stats:
-                lang_stats[lang] = 0
-            lang_stats[lang] += 1
-        
-        # Recent trend (last 7 days)
+        lang_rows = await self.db.execute(
+            select(Feedback.language, func.count())
+            .where(*conditions)
+            .group_by(Feedback.language)
+        )
+        lang_stats = {lang: count for lang, count in lang_rows}
+        
+        # Recent trend (last 7 calendar days, most recent first)
+        day = func.date(Feedback.created_at).label('day')
+        trend_start = datetime.combine(now.date() - timedelta(days=6), datetime.min.time())
+        trend_rows = await self.db.execute(
+            select(day, func.count(), func.avg(Feedback.rating))
+            .where(*conditions, Feedback.created_at >= trend_start)
+            .group_by(day)
+        )
+        # date() comes back as a date on PostgreSQL and as text on SQLite
+        by_day = {str(d)[:10]: (count, day_avg) for d, count, day_avg in trend_rows}
+        
         trend = []
         for i in range(7):
-            day_start = datetime.utcnow() - timedelta(days=i+1)
-            day_end = datetime.utcnow() - timedelta(days=i)
-            
-            day_feedbacks = [f for f in feedbacks if day_start <= f.created_at < day_end]
-            day_avg_rating = sum(f.rating for f in day_feedbacks) / len(day_feedbacks) if day_feedbacks else 0
-            
+            date_key = (now.date() - timedelta(days=i)).isoformat()
+            count, day_avg = by_day.get(date_key, (0, None))
             trend.append({
-                'date': day_start.strftime('%Y-%m-%d'),
-                'count': len(day_feedbacks),
-                'avg_rating': day_avg_rating
+                'date': date_key,
+                'count': count,
+                'avg_rating': float(day_avg) if day_avg is not None else 0
             })
         
         return FeedbackStats(
             total_feedbacks=total_feedbacks,
-            avg_rating=avg_rating,
+            avg_rating=float(avg_rating),
             sentiment_distribution={},  # Will be filled by NLP service
             urgent_count=urgent_count,
             by_department=dept_stats,
@@ -203,13 +349,38 @@ class FeedbackService:
             recent_trend=trend
         )
     
-    def patient_exists(self, patient_id: int) -> bool:
+    async def patient_exists(self, patient_id: int) -> bool:
         """Check if patient exists"""
-        return self.db.query(Patient).filter(Patient.id == patient_id).first() is not None
+        return await self.db.scalar(select(exists().where(Patient.id == patient_id)))
     
-    def department_exists(self, department_id: int) -> bool:
+    async def department_exists(self, department_id: int) -> bool:
         """Check if department exists"""
-        return self.db.query(Department).filter(Department.id == department_id).first() is not None
+        if department_id in department_cache:
+            return True
+        
+        found = await self.db.scalar(select(exists().where(Department.id == department_id)))
+        if found:
+            remember_department(department_id)
+        return found
+    
+    async def patients_exist(self, patient_ids: Iterable[int]) -> Set[int]:
+        """Return which of patient_ids exist, in one IN (...) query"""
+        patient_ids = set(patient_ids)
+        if not patient_ids:
+            return set()
+        return set(await self.db.scalars(select(Patient.id).where(Patient.id.in_(patient_ids))))
+    
+    async def departments_exist(self, department_ids: Iterable[int]) -> Set[int]:
+        """Return which of department_ids exist; only uncached ids are queried"""
+        department_ids = set(department_ids)
+        existing = {d for d in department_ids if d in department_cache}
+        unknown = department_ids - existing
+        if unknown:
+            found = set(await self.db.scalars(select(Department.id).where(Department.id.in_(unknown))))
+            for department_id in found:
+                remember_department(department_id)
+            existing |= found
+        return existing
     
     def _calculate_urgency(self, text: str, rating: float) -> float:
         """Calculate urgency score based on text and rating"""
@@ -222,17 +393,8 @@ class FeedbackService:
             urgency_score += 0.2
         
         # Urgent keywords (simplified)
-        urgent_keywords = [
-            'urgent', 'emergency', 'pain', 'douleur', 'urgent', 'urgence',
-            'terrible', 'awful', 'horrible', 'disaster', 'catastrophe',
-            'unacceptable', 'inacceptable', 'worst', 'pire'
-        ]
-        
-        text_lower = text.lower()
-        for keyword in urgent_keywords:
-            if keyword in text_lower:
-                urgency_score += 0.3
-                break
+        if _URGENT_KEYWORDS_RE.search(text):
+            urgency_score += 0.3
         
         # Length of complaint (longer = potentially more serious)
         if len(text) > 200:
@@ -240,16 +402,8 @@ class FeedbackService:
         
         return min(urgency_score, 1.0)
     
-    def count_feedbacks(self, filters: Optional[Dict[str, Any]] = None) -> int:
+    async def count_feedbacks(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """Count total feedbacks with optional filters"""
-        query = self.db.query(Feedback)
+        query = self._apply_filters(select(func.count()).select_from(Feedback), filters)
         
-        if filters:
-            if 'department_id' in filters:
-                query = query.filter(Feedback.department_id == filters['department_id'])
-            if 'is_urgent' in filters:
-                query = query.filter(Feedback.is_urgent == filters['is_urgent'])
-            if 'status' in filters:
-                query = query.filter(Feedback.status == filters['status'])
-        
-        return query.count()
\ No newline at end of file
+        return await self.db.scalar(query)
\ No newline at end of file
@@ -1,147 +1,309 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload, aliased, load_only
+from sqlalchemy import select, insert, update, delete, exists, func
+from sqlalchemy.engine import Row
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Tuple
+from itertools import groupby
 import logging
 
 from ..database.models import Patient, Department, Feedback
-from ..schemas.patient import PatientCreate, PatientUpdate, PatientSummary
+from ..schemas.patient import PatientCreate, PatientUpdate
+from ..schemas._internal import PatientSummaryRow
+from ..utils.cache import department_cache, remember_department, invalidate_patient_lists
 
 logger = logging.getLogger(__name__)
 
 class PatientService:
     """Service class for patient operations"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_patients(
+    async def get_patients(
         self, 
         skip: int = 0, 
         limit: int = 100, 
-        filters: Optional[Dict[str, Any]] = None
-    ) -> List[Patient]:
-        """Get patients with optional filtering"""
-        query = self.db.query(Patient)
+        filters: Optional[Dict[str, Any]] = None,
+        after_id: Optional[int] = None
+    ) -> Tuple[List[Patient], Optional[int]]:
+        """
+        Get patients with optional filtering, ordered by id
+
+        When after_id is given, pages with a keyset seek on the primary key
+        instead of OFFSET, and skip is ignored.
+
+        The Patient schema only reads columns, so relationships are never
+        needed here; raiseload turns any accidental per-row lazy load
+        (N+1) into an error instead of a silent extra SELECT.
+
+        Returns:
+            Tuple of (patients, total) where total is the number of patients
+            matching the filters. It is counted only for the first page of a
+            keyset walk (after_id is None), so later pages don't recount the
+            whole filtered set; it is None for them.
+        """
+        query = select(Patient).options(raiseload("*")).order_by(Patient.id)
         
         if filters:
             if 'department_id' in filters:
-                query = query.filter(Patient.department_id == filters['department_id'])
+                query = query.where(Patient.department_id == filters['department_id'])
             if 'preferred_language' in filters:
-                query = query.filter(Patient.preferred_language == filters['preferred_language'])
+                query = query.where(Patient.preferred_language == filters['preferred_language'])
+        
+        if after_id is not None:
+            query = query.where(Patient.id > after_id)
+            total = None
+        else:
+            query = query.offset(skip)
+            total = await self.count_patients(filters)
         
-        return query.offset(skip).limit(limit).all()
+        patients = (await self.db.scalars(query.limit(limit))).all()
+        return patients, total
     
-    def get_patients_summary(self, skip: int = 0, limit: int = 100) -> List[PatientSummary]:
-        """Get patients with feedback statistics"""
-        query = self.db.query(
+    async def get_patients_summary(
+        self, 
+        skip: int = 0, 
+        limit: int = 100, 
+        after_id: Optional[int] = None
+    ) -> List[PatientSummaryRow]:
+        """
+        Get patients with feedback statistics, ordered by id
+
+        Selects only the summary columns and aggregates, so no Patient
+        objects are hydrated.
+        """
+        query = select(
             Patient.id,
             Patient.first_name,
             Patient.last_name,
             Patient.preferred_language,
             Patient.department_id,
+            Department.name.label('department_name'),
             func.count(Feedback.id).label('total_feedbacks'),
             func.avg(Feedback.rating).label('avg_rating')
-        ).outerjoin(Feedback).group_by(Patient.id)
+        ).join(
+            Department, Patient.department_id == Department.id
+        ).outerjoin(
+            Feedback, Feedback.patient_id == Patient.id
+        ).group_by(Patient.id, Department.name).order_by(Patient.id)
         
-        results = query.offset(skip).limit(limit).all()
+        if after_id is not None:
+            query = query.where(Patient.id > after_id)
+        else:
+            query = query.offset(skip)
         
-        summaries = []
-        for result in results:
-            summaries.append(PatientSummary(
-                id=result.id,
-                first_name=result.first_name,
-                last_name=result.last_name,
-                preferred_language=result.preferred_language,
-                department_id=result.department_id,
-                total_feedbacks=result.total_feedbacks or 0,
-                avg_rating=float(result.avg_rating) if result.avg_rating else None
-            ))
-        
-        return summaries
+        results = await self.db.execute(query.limit(limit))
+        # Rows come typed from the database, so they are carried in plain
+        # dataclasses rather than validated models
+        return [
+            PatientSummaryRow(
+                id=row.id,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                preferred_language=row.preferred_language,
+                department_id=row.department_id,
+                department_name=row.department_name,
+                total_feedbacks=row.total_feedbacks or 0,
+                avg_rating=float(row.avg_rating) if row.avg_rating is not None else None
+            )
+            for row in results
+        ]
     
-    def get_patient(self, patient_id: int) -> Optional[Patient]:
+    async def get_patient(self, patient_id: int) -> Optional[Patient]:
         """Get patient by ID"""
-        return self.db.query(Patient).filter(Patient.id == patient_id).first()
+        return await self.db.get(Patient, patient_id)
     
-    def create_patient(self, patient_data: PatientCreate) -> Patient:
-        """Create new patient"""
-        db_patient = Patient(**patient_data.model_dump())
-        self.db.add(db_patient)
-        self.db.commit()
-        self.db.refresh(db_patient)
+    async def create_patient(self, patient_data: PatientCreate) -> Patient:
+        """
+        Create new patient
+
+        The department is validated by its foreign key rather than a
+        separate lookup, and the row is written and read back with a
+        single INSERT ... RETURNING.
+
+        Raises:
+            ValueError: If the department does not exist
+        """
+        try:
+            db_patient = await self.db.scalar(
+                insert(Patient).values(**patient_data.model_dump()).returning(Patient)
+            )
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Department not found")
+        await invalidate_patient_lists()
         
-        logger.info(f"Created patient: {db_patient.first_name} {db_patient.last_name}")
+        logger.info("Created patient: %s %s", db_patient.first_name, db_patient.last_name)
         return db_patient
     
-    def update_patient(self, patient_id: int, patient_data: PatientUpdate) -> Patient:
-        """Update patient"""
-        db_patient = self.get_patient(patient_id)
-        if not db_patient:
-            raise ValueError("Patient not found")
-        
+    async def update_patient(self, patient_id: int, patient_data: PatientUpdate) -> Optional[Patient]:
+        """
+        Update patient with a single UPDATE ... RETURNING
+
+        Returns:
+            The updated patient, or None if it does not exist
+
+        Raises:
+            ValueError: If the new department does not exist
+        """
         update_data = patient_data.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_patient, field, value)
+        if not update_data:
+            return await self.get_patient(patient_id)
+        
+        try:
+            db_patient = await self.db.scalar(
+                update(Patient)
+                .where(Patient.id == patient_id)
+                .values(**update_data)
+                .returning(Patient)
+            )
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Department not found")
         
-        self.db.commit()
-        self.db.refresh(db_patient)
+        if db_patient is None:
+            return None
         
-        logger.info(f"Updated patient {patient_id}")
+        await invalidate_patient_lists()
+        
+        logger.info("Updated patient %s", patient_id)
         return db_patient
     
-    def delete_patient(self, patient_id: int) -> bool:
-        """Delete patient"""
-        db_patient = self.get_patient(patient_id)
-        if not db_patient:
+    async def delete_patient(self, patient_id: int) -> bool:
+        """
+        Delete patient with a single DELETE ... RETURNING
+
+        Returns:
+            True if deleted, False if the patient does not exist
+
+        Raises:
+            ValueError: If feedbacks or other records still reference the patient
+        """
+        try:
+            deleted_id = await self.db.scalar(
+                delete(Patient).where(Patient.id == patient_id).returning(Patient.id)
+            )
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
+            raise ValueError("Cannot delete patient with existing feedbacks")
+        
+        if deleted_id is None:
             return False
         
-        self.db.delete(db_patient)
-        self.db.commit()
+        await invalidate_patient_lists()
         
-        logger.info(f"Deleted patient {patient_id}")
+        logger.info("Deleted patient %s", patient_id)
         return True
     
-    def department_exists(self, department_id: int) -> bool:
+    async def department_exists(self, department_id: int) -> bool:
         """Check if department exists"""
-        return self.db.query(Department).filter(Department.id == department_id).first() is not None
+        if department_id in department_cache:
+            return True
+        
+        found = await self.db.scalar(select(exists().where(Department.id == department_id)))
+        if found:
+            remember_department(department_id)
+        return found
     
-    def patient_has_feedbacks(self, patient_id: int) -> bool:
+    async def patient_has_feedbacks(self, patient_id: int) -> bool:
         """Check if patient has any feedbacks"""
-        count = self.db.query(Feedback).filter(Feedback.patient_id == patient_id).count()
-        return count > 0
+        return await self.db.scalar(select(exists().where(Feedback.patient_id == patient_id)))
     
-    def get_patient_feedbacks(self, patient_id: int, skip: int = 0, limit: int = 50) -> List[Feedback]:
+    async def get_patient_feedbacks(self, patient_id: int, skip: int = 0, limit: int = 50) -> List[Feedback]:
         """Get feedbacks for a specific patient"""
-        return self.db.query(Feedback).filter(
-            Feedback.patient_id == patient_id
-        ).order_by(Feedback.created_at.desc()).offset(skip).limit(limit).all()
+        return (await self.db.scalars(
+            select(Feedback).options(raiseload("*")).where(
+                Feedback.patient_id == patient_id
+            ).order_by(Feedback.created_at.desc()).offset(skip).limit(limit)
+        )).all()
     
-    def search_patients(self, search_term: str, limit: int = 20) -> List[Patient]:
-        """Search patients by name or email"""
-        search_pattern = f"%{search_term}%"
+    async def get_feedbacks_for_patients(
+        self, 
+        patient_ids: List[int], 
+        limit_per_patient: int = 50
+    ) -> Dict[int, List[Feedback]]:
+        """
+        Get the latest feedbacks of several patients in one query
+
+        Rows are ranked per patient in SQL so only limit_per_patient rows
+        each come back, already sorted by patient, then grouped here.
+        Patients without feedbacks map to an empty list.
+        """
+        ranked = select(
+            Feedback,
+            func.row_number().over(
+                partition_by=Feedback.patient_id,
+                order_by=(Feedback.created_at.desc(), Feedback.id.desc())
+            ).label('rank')
+        ).where(Feedback.patient_id.in_(patient_ids)).subquery()
+        ranked_feedback = aliased(Feedback, ranked)
+        
+        feedbacks = await self.db.scalars(
+            select(ranked_feedback)
+            .options(raiseload("*"))
+            .where(ranked.c.rank <= limit_per_patient)
+            .order_by(ranked.c.patient_id, ranked.c.rank)
+        )
         
-        return self.db.query(Patient).filter(
+        by_patient = {patient_id: [] for patient_id in patient_ids}
+        for patient_id, group in groupby(feedbacks, key=lambda f: f.patient_id):
+            by_patient[patient_id] = list(group)
+        return by_patient
+    
+    def _search_condition(self, search_term: str):
+        """ILIKE on name and email, served by the pg_trgm GIN indexes"""
+        search_pattern = f"%{search_term}%"
+        return (
             (Patient.first_name.ilike(search_pattern)) |
             (Patient.last_name.ilike(search_pattern)) |
             (Patient.email.ilike(search_pattern))
-        ).limit(limit).all()
+        )
+    
+    async def search_patients(self, search_term: str, limit: int = 20) -> List[Patient]:
+        """
+        Search patients by name or email
+
+        Only id, names and email are loaded; other columns are deferred.
+        """
+        return (await self.db.scalars(
+            select(Patient).options(
+                load_only(Patient.id, Patient.first_name, Patient.last_name, Patient.email),
+                raiseload("*")
+            ).where(self._search_condition(search_term)).limit(limit)
+        )).all()
+    
+    async def search_patients_summary(self, search_term: str, limit: int = 20) -> List[Row]:
+        """Search patients by name or email, returning (id, first_name, last_name, email) rows"""
+        return (await self.db.execute(
+            select(Patient.id, Patient.first_name, Patient.last_name, Patient.email)
+            .where(self._search_condition(search_term))
+            .limit(limit)
+        )).all()
     
-    def get_patients_by_department(self, department_id: int) -> List[Patient]:
+    async def get_patients_by_department(self, department_id: int) -> List[Patient]:
         """Get all patients in a specific department"""
-        return self.db.query(Patient).filter(Patient.department_id == department_id).all()
+        return (await self.db.scalars(
+            select(Patient).where(Patient.department_id == department_id)
+        )).all()
     
-    def get_patients_by_language(self, language: str) -> List[Patient]:
+    async def get_patients_by_language(self, language: str) -> List[Patient]:
         """Get patients by preferred language"""
-        return self.db.query(Patient).filter(Patient.preferred_language == language).all()
+        return (await self.db.scalars(
+            select(Patient).where(Patient.preferred_language == language)
+        )).all()
     
-    def count_patients(self, filters: Optional[Dict[str, Any]] = None) -> int:
+    async def count_patients(self, filters: Optional[Dict[str, Any]] = None) -> int:
         """Count total patients with optional filters"""
-        query = self.db.query(Patient)
+        query = select(func.count()).select_from(Patient)
         
         if filters:
             if 'department_id' in filters:
-                query = query.filter(Patient.department_id == filters['department_id'])
+                query = query.where(Patient.department_id == filters['department_id'])
             if 'preferred_language' in filters:
-                query = query.filter(Patient.preferred_language == filters['preferred_language'])
+                query = query.where(Patient.preferred_language == filters['preferred_language'])
         
-        return query.count()
\ No newline at end of file
+        return await self.db.scalar(query)
\ No newline at end of file
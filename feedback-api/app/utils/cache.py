@@ -1,53 +1,69 @@
-import redis
-import json
+import redis.asyncio as aioredis
+import orjson
+import hashlib
 import logging
 from typing import Any, Optional, Union
 from datetime import timedelta
+from cachetools import TTLCache
+from functools import wraps
+from pydantic import BaseModel
 
 from ..config import settings
 
 logger = logging.getLogger(__name__)
 
 class CacheManager:
-    """Redis cache manager for the feedback API"""
+    """
+    Redis cache manager for the feedback API
+
+    Uses the asyncio client, so cache calls from the request handlers never
+    block the event loop. Caching stays disabled until connect() succeeds.
+    """
     
     def __init__(self):
+        self.redis_client: Optional[aioredis.Redis] = None
+    
+    async def connect(self) -> None:
+        """Open the Redis connection pool; on failure caching is disabled"""
+        client = aioredis.from_url(
+            settings.REDIS_URL, 
+            # Replies stay bytes; orjson parses them without a str decode
+            decode_responses=False,
+            socket_timeout=5,
+            retry_on_timeout=True
+        )
         try:
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL, 
-                decode_responses=True,
-                socket_timeout=5,
-                retry_on_timeout=True
-            )
             # Test connection
-            self.redis_client.ping()
+            await client.ping()
+            self.redis_client = client
             logger.info("Connected to Redis cache")
         except Exception as e:
-            logger.warning(f"Could not connect to Redis: {e}. Caching disabled.")
+            logger.warning("Could not connect to Redis: %s. Caching disabled.", e)
+            await client.aclose()
             self.redis_client = None
     
-    def _serialize_value(self, value: Any) -> str:
+    def _serialize_value(self, value: Any) -> Union[str, bytes]:
         """Serialize value for storage in Redis"""
         if isinstance(value, (dict, list)):
-            return json.dumps(value, ensure_ascii=False)
+            return orjson.dumps(value)
         elif isinstance(value, (int, float, bool)):
             return str(value)
         else:
             return str(value)
     
-    def _deserialize_value(self, value: str) -> Any:
+    def _deserialize_value(self, value: Union[str, bytes]) -> Any:
         """Deserialize value from Redis storage"""
         if not value:
             return None
         
         try:
             # Try to parse as JSON first
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
+            return orjson.loads(value)
+        except orjson.JSONDecodeError:
             # Return as string if not JSON
-            return value
+            return value.decode("utf-8", errors="replace") if isinstance(value, bytes) else value
     
-    def set(
+    async def set(
         self, 
         key: str, 
         value: Any, 
@@ -75,14 +91,14 @@ class CacheManager:
             elif isinstance(ttl, timedelta):
                 ttl = int(ttl.total_seconds())
             
-            result = self.redis_client.setex(key, ttl, serialized_value)
-            logger.debug(f"Cached key '{key}' with TTL {ttl}s")
+            result = await self.redis_client.setex(key, ttl, serialized_value)
+            logger.debug("Cached key '%s' with TTL %ss", key, ttl)
             return result
         except Exception as e:
-            logger.error(f"Error setting cache key '{key}': {e}")
+            logger.error("Error setting cache key '%s': %s", key, e)
             return False
     
-    def get(self, key: str) -> Any:
+    async def get(self, key: str) -> Any:
         """
         Get a value from cache
         
@@ -96,18 +112,18 @@ class CacheManager:
             return None
         
         try:
-            value = self.redis_client.get(key)
+            value = await self.redis_client.get(key)
             if value is not None:
-                logger.debug(f"Cache hit for key '{key}'")
+                logger.debug("Cache hit for key '%s'", key)
                 return self._deserialize_value(value)
             else:
-                logger.debug(f"Cache miss for key '{key}'")
+                logger.debug("Cache miss for key '%s'", key)
                 return None
         except Exception as e:
-            logger.error(f"Error getting cache key '{key}': {e}")
+            logger.error("Error getting cache key '%s': %s", key, e)
             return None
     
-    def delete(self, key: str) -> bool:
+    async def delete(self, key: str) -> bool:
         """
         Delete a key from cache
         
@@ -121,14 +137,35 @@ class CacheManager:
             return False
         
         try:
-            result = self.redis_client.delete(key)
-            logger.debug(f"Deleted cache key '{key}'")
+            result = await self.redis_client.delete(key)
+            logger.debug("Deleted cache key '%s'", key)
             return bool(result)
         except Exception as e:
-            logger.error(f"Error deleting cache key '{key}': {e}")
+            logger.error("Error deleting cache key '%s': %s", key, e)
             return False
     
-    def exists(self, key: str) -> bool:
+    async def unlink(self, *keys: str) -> int:
+        """
+        Delete several keys in one round trip, freeing them in the background
+        
+        Args:
+            *keys: Cache keys to delete
+            
+        Returns:
+            Number of keys deleted
+        """
+        if not self.redis_client or not keys:
+            return 0
+        
+        try:
+            deleted = await self.redis_client.unlink(*keys)
+            logger.debug("Unlinked cache keys %s", keys)
+            return deleted
+        except Exception as e:
+            logger.error("Error unlinking cache keys %s: %s", keys, e)
+            return 0
+    
+    async def exists(self, key: str) -> bool:
         """
         Check if a key exists in cache
         
@@ -142,12 +179,12 @@ class CacheManager:
             return False
         
         try:
-            return bool(self.redis_client.exists(key))
+            return bool(await self.redis_client.exists(key))
         except Exception as e:
-            logger.error(f"Error checking cache key '{key}': {e}")
+            logger.error("Error checking cache key '%s': %s", key, e)
             return False
     
-    def increment(self, key: str, amount: int = 1) -> Optional[int]:
+    async def increment(self, key: str, amount: int = 1) -> Optional[int]:
         """
         Increment a numeric value in cache
         
@@ -162,21 +199,22 @@ class CacheManager:
             return None
         
         try:
-            result = self.redis_client.incrby(key, amount)
-            logger.debug(f"Incremented cache key '{key}' by {amount}")
+            result = await self.redis_client.incrby(key, amount)
+            logger.debug("Incremented cache key '%s' by %s", key, amount)
             return result
         except Exception as e:
-            logger.error(f"Error incrementing cache key '{key}': {e}")
+            logger.error("Error incrementing cache key '%s': %s", key, e)
             return None
     
-    def set_hash(self, key: str, mapping: dict, ttl: Optional[int] = None) -> bool:
+    async def set_hash(self, key: str, mapping: dict, ttl: Optional[int] = None) -> bool:
         """
         Set multiple fields in a hash
         
         Args:
             key: Hash key
             mapping: Dictionary of field-value pairs
-            ttl: Optional TTL in seconds
+            ttl: Optional TTL in seconds, applied only when the hash has
+                none yet, so no field outlives it by more than ttl
             
         Returns:
             True if successful, False otherwise
@@ -191,18 +229,20 @@ class CacheManager:
                 for field, value in mapping.items()
             }
             
-            self.redis_client.hset(key, mapping=serialized_mapping)
-            
+            # One round trip for the write and its TTL
+            pipe = self.redis_client.pipeline(transaction=False)
+            pipe.hset(key, mapping=serialized_mapping)
             if ttl:
-                self.redis_client.expire(key, ttl)
+                pipe.expire(key, ttl, nx=True)
+            await pipe.execute()
             
-            logger.debug(f"Set hash '{key}' with {len(mapping)} fields")
+            logger.debug("Set hash '%s' with %d fields", key, len(mapping))
             return True
         except Exception as e:
-            logger.error(f"Error setting hash '{key}': {e}")
+            logger.error("Error setting hash '%s': %s", key, e)
             return False
     
-    def get_hash(self, key: str, field: Optional[str] = None) -> Any:
+    async def get_hash(self, key: str, field: Optional[str] = None) -> Any:
         """
         Get field(s) from a hash
         
@@ -218,22 +258,25 @@ class CacheManager:
         
         try:
             if field:
-                value = self.redis_client.hget(key, field)
+                value = await self.redis_client.hget(key, field)
                 return self._deserialize_value(value) if value else None
             else:
-                hash_data = self.redis_client.hgetall(key)
+                hash_data = await self.redis_client.hgetall(key)
                 return {
-                    k: self._deserialize_value(v) 
+                    k.decode("utf-8"): self._deserialize_value(v) 
                     for k, v in hash_data.items()
                 } if hash_data else None
         except Exception as e:
-            logger.error(f"Error getting hash '{key}': {e}")
+            logger.error("Error getting hash '%s': %s", key, e)
             return None
     
-    def invalidate_pattern(self, pattern: str) -> int:
+    async def invalidate_pattern(self, pattern: str) -> int:
         """
         Delete all keys matching a pattern
         
+        Walks the keyspace with SCAN and frees each batch with UNLINK, so
+        Redis is never blocked the way a single KEYS call would block it.
+        
         Args:
             pattern: Redis pattern (e.g., "user:*", "stats:*")
             
@@ -244,17 +287,23 @@ class CacheManager:
             return 0
         
         try:
-            keys = self.redis_client.keys(pattern)
-            if keys:
-                deleted = self.redis_client.delete(*keys)
-                logger.info(f"Invalidated {deleted} keys matching pattern '{pattern}'")
-                return deleted
-            return 0
+            deleted = 0
+            cursor = 0
+            while True:
+                cursor, keys = await self.redis_client.scan(cursor=cursor, match=pattern, count=500)
+                if keys:
+                    deleted += await self.redis_client.unlink(*keys)
+                if cursor == 0:
+                    break
+            
+            if deleted:
+                logger.info("Invalidated %s keys matching pattern '%s'", deleted, pattern)
+            return deleted
         except Exception as e:
-            logger.error(f"Error invalidating pattern '{pattern}': {e}")
+            logger.error("Error invalidating pattern '%s': %s", pattern, e)
             return 0
     
-    def get_stats(self) -> dict:
+    async def get_stats(self) -> dict:
         """
         Get cache statistics
         
@@ -265,7 +314,7 @@ class CacheManager:
             return {"status": "disabled"}
         
         try:
-            info = self.redis_client.info()
+            info = await self.redis_client.info()
             return {
                 "status": "connected",
                 "used_memory": info.get("used_memory_human", "unknown"),
@@ -276,13 +325,86 @@ class CacheManager:
                 "uptime_in_seconds": info.get("uptime_in_seconds", 0)
             }
         except Exception as e:
-            logger.error(f"Error getting cache stats: {e}")
+            logger.error("Error getting cache stats: %s", e)
             return {"status": "error", "error": str(e)}
+    
+    async def close(self) -> None:
+        """Close the Redis connection pool"""
+        if not self.redis_client:
+            return
+        
+        client, self.redis_client = self.redis_client, None
+        await client.aclose()
+        logger.info("Disconnected from Redis cache")
 
 
 # Global cache instance
 cache = CacheManager()
 
+# Cached GET /patients and /patients/summary pages live in one hash each,
+# one field per page, so a write drops them with a single UNLINK. Summary
+# pages carry feedback counts; plain list pages don't depend on feedbacks.
+PATIENT_LIST_CACHE_KEY = "patients:pages"
+PATIENT_SUMMARY_CACHE_KEY = "patients:summary"
+
+
+async def invalidate_patient_lists() -> int:
+    """Drop every cached patient list/summary page after a patient write"""
+    return await cache.unlink(PATIENT_LIST_CACHE_KEY, PATIENT_SUMMARY_CACHE_KEY)
+
+
+async def invalidate_patient_summaries() -> int:
+    """Drop the cached summary pages after a feedback write"""
+    return await cache.unlink(PATIENT_SUMMARY_CACHE_KEY)
+
+# Cached GET /feedbacks/stats results live in one hash per department,
+# stats:dept:<department_id|all>, with one field per window (days:<days>),
+# so a feedback write drops them with a single UNLINK.
+FEEDBACK_STATS_CACHE_PREFIX = "stats"
+FEEDBACK_STATS_CACHE_TTL = 60
+
+# Worker-local copy of recently served stats. Dashboards poll every few
+# seconds, so repeated polls within the TTL skip even the Redis round-trip;
+# other workers may lag a write by at most this many seconds.
+FEEDBACK_STATS_LOCAL_TTL = 5
+feedback_stats_local: TTLCache = TTLCache(maxsize=256, ttl=FEEDBACK_STATS_LOCAL_TTL)
+
+
+def feedback_stats_key(department_id: Optional[int]) -> str:
+    """Hash holding the cached feedback stats of a department (None = all)"""
+    return cache_key(FEEDBACK_STATS_CACHE_PREFIX, "dept", department_id or "all")
+
+
+def feedback_stats_field(days: int) -> str:
+    """Field of a stats hash holding the stats over the last `days` days"""
+    return cache_key("days", days)
+
+
+async def invalidate_feedback_stats(*department_ids: int) -> int:
+    """Drop cached stats covering the given departments after a feedback write"""
+    feedback_stats_local.clear()
+    return await cache.unlink(
+        feedback_stats_key(None),
+        *(feedback_stats_key(department_id) for department_id in set(department_ids))
+    )
+
+# In-process cache of department ids known to exist. Departments change
+# rarely but are checked on nearly every patient/feedback write. The cache
+# is per worker, so a delete in another worker can leave a stale entry:
+# callers may only use it to skip a pre-check that the department foreign
+# key enforces anyway (they must still handle the IntegrityError).
+department_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+
+
+def remember_department(department_id: int) -> None:
+    """Record that a department exists"""
+    department_cache[department_id] = True
+
+
+def invalidate_department(department_id: int) -> None:
+    """Drop the cached entry for a deleted department"""
+    department_cache.pop(department_id, None)
+
 
 def cache_key(*args: str) -> str:
     """
@@ -297,41 +419,67 @@ def cache_key(*args: str) -> str:
     return ":".join(str(arg) for arg in args)
 
 
+# Stored in place of a None result, so misses for absent data are cached too
+_CACHED_NONE = {"__cached_none__": True}
+
+
+def _result_cache_key(key_prefix: str, func, args: tuple, kwargs: dict) -> Optional[str]:
+    """
+    Build a fixed-length cache key for a function call
+
+    The arguments are encoded canonically with orjson and hashed, so keys
+    stay short and never collide on str(). Returns None when an argument
+    has no stable encoding (e.g. a database session), in which case the
+    call is not cached.
+    """
+    try:
+        payload = orjson.dumps(
+            [func.__module__, func.__qualname__, args, sorted(kwargs.items())],
+            default=_encode_key_part,
+            option=orjson.OPT_SORT_KEYS
+        )
+    except TypeError:
+        return None
+    digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    return cache_key(key_prefix, func.__qualname__, digest)
+
+
+def _encode_key_part(value: Any) -> Any:
+    """orjson fallback for cache key arguments"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
 def cached_result(key_prefix: str, ttl: int = None):
     """
-    Decorator to cache function results
+    Decorator to cache the results of an async function
     
     Args:
         key_prefix: Prefix for the cache key
         ttl: Time to live in seconds
     """
     def decorator(func):
-        def wrapper(*args, **kwargs):
-            # Generate cache key from function name and arguments
-            key_parts = [key_prefix, func.__name__]
-            
-            # Add positional arguments to key
-            if args:
-                key_parts.extend(str(arg) for arg in args)
-            
-            # Add keyword arguments to key
-            if kwargs:
-                key_parts.extend(f"{k}:{v}" for k, v in sorted(kwargs.items()))
-            
-            cache_key_str = cache_key(*key_parts)
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            cache_key_str = _result_cache_key(key_prefix, func, args, kwargs)
+            if cache_key_str is None:
+                return await func(*args, **kwargs)
             
             # Try to get from cache first
-            result = cache.get(cache_key_str)
+            result = await cache.get(cache_key_str)
             if result is not None:
-                logger.debug(f"Cache hit for function {func.__name__}")
-                return result
+                logger.debug("Cache hit for function %s", func.__name__)
+                return None if result == _CACHED_NONE else result
             
             # Execute function and cache result
-            result = func(*args, **kwargs)
-            cache.set(cache_key_str, result, ttl)
+            result = await func(*args, **kwargs)
+            await cache.set(cache_key_str, _CACHED_NONE if result is None else result, ttl)
             
-            logger.debug(f"Cached result for function {func.__name__}")
+            logger.debug("Cached result for function %s", func.__name__)
             return result
         
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
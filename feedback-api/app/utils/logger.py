@@ -1,8 +1,12 @@
 import logging
 import sys
 import json
+import copy
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging"""
@@ -29,6 +33,41 @@ class JSONFormatter(logging.Formatter):
         
         return json.dumps(log_entry, ensure_ascii=False)
 
+# Records are formatted and written by a background listener thread so that
+# logging from request handlers never blocks the event loop on stdout
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_queue_listener: Optional[QueueListener] = None
+
+class _RecordQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps exc_info on queued records
+
+    The default prepare() formats the record and clears exc_info, so the
+    JSONFormatter on the listener side would lose the "exception" field.
+    The queue stays in-process, so the record only needs its message
+    merged now (its arguments may change before the listener runs).
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def _start_queue_listener() -> None:
+    """Start the shared stdout listener once per process"""
+    global _queue_listener
+    if _queue_listener is not None:
+        return
+    
+    # Console handler
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JSONFormatter())
+    
+    _queue_listener = QueueListener(_log_queue, handler, respect_handler_level=True)
+    _queue_listener.start()
+    atexit.register(_queue_listener.stop)
+
 def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     """Setup logger with JSON formatting"""
     logger = logging.getLogger(name)
@@ -39,15 +78,8 @@ def setup_logger(name: str, level: str = "INFO") -> logging.Logger:
     
     logger.setLevel(getattr(logging, level.upper()))
     
-    # Console handler
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(getattr(logging, level.upper()))
-    
-    # Set formatter
-    formatter = JSONFormatter()
-    handler.setFormatter(formatter)
-    
-    logger.addHandler(handler)
+    _start_queue_listener()
+    logger.addHandler(_RecordQueueHandler(_log_queue))
     logger.propagate = False
     
     return logger
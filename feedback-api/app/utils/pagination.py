@@ -0,0 +1,45 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Optional, Tuple
+
+CURSOR_SEPARATOR = "|"
+
+def encode_cursor(created_at: datetime, item_id: int) -> str:
+    """Encode a (created_at, id) keyset position as an opaque cursor"""
+    raw = f"{created_at.isoformat()}{CURSOR_SEPARATOR}{item_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Args:
+        cursor: Opaque cursor string from a previous page
+
+    Returns:
+        Tuple of (created_at, id) of the last item of the previous page
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, item_id = raw.rsplit(CURSOR_SEPARATOR, 1)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def next_cursor(items: list, limit: int) -> Optional[str]:
+    """Return the cursor for the page after items, or None on the last page"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(last.created_at, last.id)
+
+def next_after_id(items: list, limit: int) -> Optional[int]:
+    """Return the after_id for the page after items, or None on the last page"""
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    return last["id"] if isinstance(last, dict) else last.id
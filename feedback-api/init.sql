@@ -50,16 +50,23 @@ INSERT INTO reminder_types (
 ON CONFLICT (name) DO NOTHING;
 
 -- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_patients_department ON patients(department_id);
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS idx_patients_department_language ON patients(department_id, preferred_language);
 CREATE INDEX IF NOT EXISTS idx_patients_language ON patients(preferred_language);
-CREATE INDEX IF NOT EXISTS idx_feedbacks_patient ON feedbacks(patient_id);
-CREATE INDEX IF NOT EXISTS idx_feedbacks_department ON feedbacks(department_id);
+CREATE INDEX IF NOT EXISTS idx_patients_first_name_trgm ON patients USING gin(first_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_patients_last_name_trgm ON patients USING gin(last_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_patients_email_trgm ON patients USING gin(email gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_patient_created_at ON feedbacks(patient_id, created_at) INCLUDE (rating, status);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_department_created_at_id ON feedbacks(department_id, created_at, id);
 CREATE INDEX IF NOT EXISTS idx_feedbacks_created_at ON feedbacks(created_at);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_created_at_id ON feedbacks(created_at, id);
 CREATE INDEX IF NOT EXISTS idx_feedbacks_rating ON feedbacks(rating);
 CREATE INDEX IF NOT EXISTS idx_feedbacks_urgent ON feedbacks(is_urgent);
+CREATE INDEX IF NOT EXISTS idx_feedbacks_urgent_created_at_id ON feedbacks(created_at, id) WHERE is_urgent;
 CREATE INDEX IF NOT EXISTS idx_feedbacks_status ON feedbacks(status);
 CREATE INDEX IF NOT EXISTS idx_feedbacks_language ON feedbacks(language);
 CREATE INDEX IF NOT EXISTS idx_feedback_analysis_feedback ON feedback_analysis(feedback_id);
+CREATE INDEX IF NOT EXISTS idx_feedback_analysis_themes ON feedback_analysis USING gin(themes);
 CREATE INDEX IF NOT EXISTS idx_reminders_patient ON reminders(patient_id);
 CREATE INDEX IF NOT EXISTS idx_reminders_scheduled_date ON reminders(scheduled_date);
 CREATE INDEX IF NOT EXISTS idx_reminders_status ON reminders(status);
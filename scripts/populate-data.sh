@@ -147,8 +147,8 @@ create_additional_feedbacks() {
         '{"patient_id":ID_PLACEHOLDER,"department_id":5,"rating":4.6,"feedback_text":"Intervention chirurgicale réussie. Équipe très compétente.","language":"fr","wait_time_min":40,"resolution_time_min":120}'
     )
     
-    local created_count=0
     local patient_index=0
+    local payload=""
     
     for feedback_template in "${feedbacks[@]}"; do
         # Use modulo to cycle through available patients
@@ -156,22 +156,24 @@ create_additional_feedbacks() {
         patient_index=$((patient_index + 1))
         
         # Replace placeholder with actual patient ID
-        local feedback_data=${feedback_template//ID_PLACEHOLDER/$patient_id}
-        
-        local response=$(curl -s -w '%{http_code}' -o /tmp/feedback_create.json \
-                        -X POST \
-                        -H "Authorization: Bearer $token" \
-                        -H "Content-Type: application/json" \
-                        -d "$feedback_data" \
-                        "$FEEDBACK_API_URL/feedbacks")
-        
-        if [ "$response" -eq 201 ]; then
-            created_count=$((created_count + 1))
-        else
-            log_warning "Failed to create feedback (HTTP $response)"
-        fi
+        payload="${payload:+$payload,}${feedback_template//ID_PLACEHOLDER/$patient_id}"
     done
     
+    # One bulk request (single INSERT on the API side) instead of one per feedback
+    local created_count=0
+    local response=$(curl -s -w '%{http_code}' -o /tmp/feedback_create.json \
+                    -X POST \
+                    -H "Authorization: Bearer $token" \
+                    -H "Content-Type: application/json" \
+                    -d "[$payload]" \
+                    "$FEEDBACK_API_URL/feedbacks/bulk")
+    
+    if [ "$response" -eq 201 ]; then
+        created_count=$(grep -o '"id":[0-9]*' /tmp/feedback_create.json | wc -l)
+    else
+        log_warning "Failed to create feedbacks (HTTP $response)"
+    fi
+    
     log_success "Created $created_count additional feedbacks"
     rm -f /tmp/feedback_create.json
 }
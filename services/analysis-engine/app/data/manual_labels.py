@@ -1,3 +1,5 @@
+import sys
+
 # Labels avec RANGES de sentiment ET rating
 MANUAL_SENTIMENT_LABELS = {
     'Excellent service.': {
@@ -74,15 +76,33 @@ REAL_THEMES = {
     "satisfaction": ["excellent"]
 }
 
+# Structures figées une fois au chargement : frozenset pour les tests
+# d'appartenance sur les sentiments, tuples pour les ratings (random.choice
+# a besoin d'une séquence) et les thèmes, partagés entre analyses
+MANUAL_SENTIMENT_LABELS = {
+    feedback: {
+        'sentiment_range': frozenset(map(sys.intern, info['sentiment_range'])),
+        'rating_range': tuple(info['rating_range']),
+        'themes': tuple(map(sys.intern, info['themes']))
+    }
+    for feedback, info in MANUAL_SENTIMENT_LABELS.items()
+}
+
 # Correspondances logiques
 SENTIMENT_RATING_MAPPING = {
     'positive': [4, 5],
     'neutral': [3],        # CORRIGÉ: seulement 3 !
     'negative': [1, 2]
 }
+SENTIMENT_RATING_MAPPING = {
+    sys.intern(sentiment): tuple(ratings)
+    for sentiment, ratings in SENTIMENT_RATING_MAPPING.items()
+}
 
-print("=== LABELS AVEC RANGES DE SENTIMENT ===")
-for feedback, info in MANUAL_SENTIMENT_LABELS.items():
-    sent_str = f"[{', '.join(info['sentiment_range'])}]"
-    rating_str = f"[{', '.join(map(str, info['rating_range']))}]"
-    print(f"Sentiment {sent_str:20} | Ratings {rating_str:8} | {feedback}")
\ No newline at end of file
+if __name__ == "__main__":
+    # Affichage de contrôle uniquement en exécution directe, pas à l'import
+    print("=== LABELS AVEC RANGES DE SENTIMENT ===")
+    for feedback, info in MANUAL_SENTIMENT_LABELS.items():
+        sent_str = f"[{', '.join(sorted(info['sentiment_range']))}]"
+        rating_str = f"[{', '.join(map(str, info['rating_range']))}]"
+        print(f"Sentiment {sent_str:20} | Ratings {rating_str:8} | {feedback}")
@@ -1,7 +1,8 @@
 import pandas as pd
 import numpy as np
 
-# Charger le dataset
+# Charger le dataset (parseur C par défaut : pyarrow n'est pas une
+# dépendance du moteur d'analyse)
 df = pd.read_csv(r'C:\Code2Care\High-Five\services\analysis-engine\app\data\patient_feedback.csv')
 
 print("=== EXPLORATION DU DATASET ===")
@@ -16,22 +17,30 @@ print(df.head(5))
 print("\n=== INFO GÉNÉRALES ===")
 print(df.info())
 
+# Masques calculés une seule fois, réutilisés pour tous les comptes, les
+# exemples et le nettoyage final
+has_text = df['feedback_text'].notna()
+valid_rating = df['rating'].isin([1, 2, 3, 4, 5])
+text_count = int(has_text.sum())
+valid_count = int(valid_rating.sum())
+
 print("\n=== ANALYSE DU TEXTE ===")
-print(f"Feedbacks non vides : {df['feedback_text'].notna().sum()}")
-print(f"Feedbacks vides : {df['feedback_text'].isna().sum()}")
+print(f"Feedbacks non vides : {text_count}")
+print(f"Feedbacks vides : {len(df) - text_count}")
 
-# Longueur des textes
+# Longueur des textes (une seule passe pour les trois statistiques)
 df['text_length'] = df['feedback_text'].str.len()
-print(f"Longueur moyenne : {df['text_length'].mean():.1f} caractères")
-print(f"Longueur min : {df['text_length'].min()}")
-print(f"Longueur max : {df['text_length'].max()}")
+length_stats = df['text_length'].agg(['mean', 'min', 'max'])
+print(f"Longueur moyenne : {length_stats['mean']:.1f} caractères")
+print(f"Longueur min : {length_stats['min']}")
+print(f"Longueur max : {length_stats['max']}")
 
 print("\n=== EXEMPLES DE FEEDBACKS ===")
-for i in range(3):
+for i, row in enumerate(df.head(3).itertuples(index=False)):
     print(f"\n--- Feedback {i+1} ---")
-    print(f"Rating: {df.iloc[i]['rating']}")
-    print(f"Département: {df.iloc[i]['department']}")
-    print(f"Texte: {df.iloc[i]['feedback_text']}")
+    print(f"Rating: {row.rating}")
+    print(f"Département: {row.department}")
+    print(f"Texte: {row.feedback_text}")
 
 print("\n=== DISTRIBUTION DES RATINGS ===")
 print(df['rating'].value_counts().sort_index())
@@ -40,11 +49,12 @@ print("\n=== DÉPARTEMENTS ===")
 print(df['department'].value_counts())
 
 print("\n=== EXEMPLES DE FEEDBACKS PAR RATING ===")
-# Nettoyer les données - enlever les NaN
-df_clean = df[df['feedback_text'].notna()].copy()
+# Nettoyer les données - enlever les NaN (seulement les colonnes utilisées)
+df_clean = df.loc[has_text, ['rating', 'department', 'feedback_text', 'text_length']]
 
-for rating in [1, 3, 5]:
-    feedback_sample = df_clean[df_clean['rating'] == rating]['feedback_text'].iloc[0]
+# Premier feedback de chaque rating, en un seul groupby
+samples = df_clean[df_clean['rating'].isin([1, 3, 5])].groupby('rating').head(1)
+for rating, feedback_sample in zip(samples['rating'], samples['feedback_text']):
     print(f"\nRating {rating}: {feedback_sample}")
 
 print("\n=== LONGUEUR PAR RATING ===")
@@ -63,26 +73,29 @@ unique_ratings = df['rating'].unique()
 print(sorted(unique_ratings))
 
 print(f"\nNombre total de ratings : {len(df)}")
-print(f"Ratings valides (1-5) : {len(df[df['rating'].isin([1,2,3,4,5])])}")
-print(f"Ratings bizarres : {len(df[~df['rating'].isin([1,2,3,4,5])])}")
+print(f"Ratings valides (1-5) : {valid_count}")
+print(f"Ratings bizarres : {len(df) - valid_count}")
 
 print("\n=== EXEMPLES DE RATINGS BIZARRES ===")
-weird_ratings = df[~df['rating'].isin([1,2,3,4,5])].head(3)
+weird_ratings = df[~valid_rating].head(3)
 print(weird_ratings[['feedback_id', 'rating', 'feedback_text']])
 
 print("\n=== NETTOYAGE DES DONNÉES ===")
 # Garder seulement les ratings valides (1-5) et les textes non vides
-df_clean = df[
-    (df['rating'].isin([1, 2, 3, 4, 5])) & 
-    (df['feedback_text'].notna())
-].copy()
+total_count = len(df)
+df_clean = df[valid_rating & has_text].reset_index(drop=True)
+# Le dataset brut n'est plus utilisé : libérer la mémoire avant l'écriture
+del df, has_text, valid_rating
 
 print(f" Données nettoyées : {len(df_clean)} feedbacks")
-print(f" Ratings supprimés : {len(df) - len(df_clean)}")
+print(f" Ratings supprimés : {total_count - len(df_clean)}")
 
 print("\n=== DISTRIBUTION APRÈS NETTOYAGE ===")
 print(df_clean['rating'].value_counts().sort_index())
 
-# Sauvegarder le dataset propre
-df_clean.to_csv('patient_feedback_clean.csv', index=False)
+# Sauvegarder le dataset propre (tampon de 1 Mo : quelques gros write()
+# au lieu d'un par bloc de lignes). Le CSV reste le format lu par
+# rating_analysis.py, real_data_analysis.py et test_full_dataset.py.
+with open('patient_feedback_clean.csv', 'w', encoding='utf-8', newline='', buffering=1024 * 1024) as f:
+    df_clean.to_csv(f, index=False)
 print(f"\n Dataset propre sauvegardé : patient_feedback_clean.csv")
\ No newline at end of file
@@ -1,7 +1,21 @@
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+import os
+
+# Un thread BLAS/OpenMP par worker : le parallélisme vient du pool de
+# threads ci-dessous, pas des bibliothèques numériques (à définir avant
+# l'import de spaCy/numpy)
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 from typing import List, Dict, Optional
+from contextlib import asynccontextmanager
 from .nlp_analyzer import FeedbackAnalyzer
+from .data.manual_labels import MANUAL_SENTIMENT_LABELS
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import time
 import logging
 
@@ -9,19 +23,69 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# L'analyse est CPU-bound : elle tourne dans un pool de threads borné pour
+# ne pas bloquer la boucle d'événements, et le sémaphore limite le nombre
+# de requêtes en attente d'un thread. Tous deux sont créés par le lifespan
+# (sur sa boucle) et rangés dans app.state, à côté de l'analyseur
+_CPU_COUNT = os.cpu_count() or 1
+
+async def run_analysis(func, *args):
+    """Exécuter une fonction d'analyse hors de la boucle d'événements"""
+    async with app.state.analysis_slots:
+        return await asyncio.get_running_loop().run_in_executor(app.state.executor, func, *args)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Démarrage : chargement des modèles hors de la boucle d'événements,
+    # une seule fois par processus
+    logger.info("Chargement de l'analyseur")
+    app.state.analyzer = await asyncio.to_thread(FeedbackAnalyzer)
+    app.state.executor = ThreadPoolExecutor(max_workers=_CPU_COUNT, thread_name_prefix="analysis")
+    app.state.analysis_slots = asyncio.Semaphore(_CPU_COUNT * 2)
+
+    yield
+
+    # Arrêt
+    app.state.executor.shutdown(wait=False, cancel_futures=True)
+
 # Initialisation FastAPI
 app = FastAPI(
     title="Feedback Analysis Engine", 
     version="1.0.0",
-    description="API d'analyse de feedbacks patients multilingue"
+    description="API d'analyse de feedbacks patients multilingue",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-# Initialisation de l'analyseur (global pour éviter de recharger)
-analyzer = FeedbackAnalyzer()
+# Compression des réponses volumineuses (/analyze/batch : jusqu'à 100
+# résultats aux clés répétées) ; les petites réponses restent non compressées
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+def get_analyzer(request: Request) -> FeedbackAnalyzer:
+    """Analyseur chargé au démarrage de l'application"""
+    return request.app.state.analyzer
+
+# Statistiques des labels manuels, constantes : calculées une fois au
+# chargement (un seul parcours) plutôt qu'à chaque appel de /stats
+_sentiment_counts = Counter(
+    sentiment
+    for labels in MANUAL_SENTIMENT_LABELS.values()
+    for sentiment in labels['sentiment_range']
+)
+STATS = {
+    "supported_feedbacks": len(MANUAL_SENTIMENT_LABELS),
+    "feedback_types": list(MANUAL_SENTIMENT_LABELS.keys()),
+    "sentiment_distribution": {
+        "positive": _sentiment_counts['positive'],
+        "neutral": _sentiment_counts['neutral'],
+        "negative": _sentiment_counts['negative']
+    }
+}
 
 # Modèles Pydantic
 class AnalysisRequest(BaseModel):
-    text: str
+    # Longueur vérifiée à la validation, avant d'entrer dans le handler
+    text: str = Field(..., max_length=1000)
     language: Optional[str] = "en"
 
 class AnalysisResponse(BaseModel):
@@ -53,16 +117,21 @@ async def root():
     }
 
 @app.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     """Vérification de l'état de l'API"""
     return HealthResponse(
         status="healthy",
-        analyzer_loaded=analyzer is not None,
+        analyzer_loaded=getattr(request.app.state, "analyzer", None) is not None,
         version="1.0.0"
     )
 
-@app.post("/analyze", response_model=AnalysisResponse)
-async def analyze_feedback(request: AnalysisRequest):
+# Schéma documenté via responses= plutôt que response_model : FastAPI
+# revaliderait sinon chaque réponse contre AnalysisResponse
+@app.post("/analyze", response_model=None, responses={200: {"model": AnalysisResponse}})
+async def analyze_feedback(
+    request: AnalysisRequest,
+    analyzer: FeedbackAnalyzer = Depends(get_analyzer)
+):
     """Analyser un feedback unique"""
     try:
         start_time = time.time()
@@ -71,43 +140,44 @@ async def analyze_feedback(request: AnalysisRequest):
         if not request.text.strip():
             raise HTTPException(status_code=400, detail="Le texte ne peut pas être vide")
         
-        if len(request.text) > 1000:
-            raise HTTPException(status_code=400, detail="Texte trop long (max 1000 caractères)")
-        
-        # Analyse
-        result = analyzer.analyze_feedback(request.text)
+        # Analyse (les traits du texte sont mis en cache par l'analyseur ;
+        # la note et l'urgence sont retirées à chaque appel)
+        result = await run_analysis(analyzer.analyze_feedback, request.text)
         
         processing_time = (time.time() - start_time) * 1000  # en ms
         
-        return AnalysisResponse(
-            original_text=result["original_text"],
-            language=result["language"],
-            sentiment=result["sentiment"],
-            predicted_rating=result["predicted_rating"],
-            themes=result["themes"],
-            keywords=result["keywords"],
-            is_urgent=result["is_urgent"],
-            processing_time_ms=round(processing_time, 2)
-        )
+        # Champs produits par l'analyseur : encodés directement par orjson,
+        # sans revalidation
+        return ORJSONResponse({
+            "original_text": result["original_text"],
+            "language": result["language"],
+            "sentiment": result["sentiment"],
+            "predicted_rating": result["predicted_rating"],
+            "themes": result["themes"],
+            "keywords": result["keywords"],
+            "is_urgent": result["is_urgent"],
+            "processing_time_ms": round(processing_time, 2)
+        })
         
     except Exception as e:
         logger.error(f"Erreur lors de l'analyse : {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erreur interne : {str(e)}")
 
 @app.post("/analyze/batch")
-async def analyze_batch(request: BatchAnalysisRequest):
+async def analyze_batch(
+    request: BatchAnalysisRequest,
+    analyzer: FeedbackAnalyzer = Depends(get_analyzer)
+):
     """Analyser plusieurs feedbacks en lot"""
     try:
         if len(request.feedbacks) > 100:
             raise HTTPException(status_code=400, detail="Maximum 100 feedbacks par batch")
         
         start_time = time.time()
-        results = []
         
-        for feedback_req in request.feedbacks:
-            if feedback_req.text.strip():  # Ignorer les textes vides
-                result = analyzer.analyze_feedback(feedback_req.text)
-                results.append(result)
+        # Ignorer les textes vides, puis analyser le lot en un seul appel
+        texts = [f.text for f in request.feedbacks if f.text.strip()]
+        results = await run_analysis(analyzer.analyze_batch, texts)
         
         processing_time = (time.time() - start_time) * 1000
         
@@ -125,18 +195,7 @@ async def analyze_batch(request: BatchAnalysisRequest):
 @app.get("/stats")
 async def get_stats():
     """Statistiques sur les types de feedbacks supportés"""
-    from .data.manual_labels import MANUAL_SENTIMENT_LABELS
-    
-    stats = {
-        "supported_feedbacks": len(MANUAL_SENTIMENT_LABELS),
-        "feedback_types": list(MANUAL_SENTIMENT_LABELS.keys()),
-        "sentiment_distribution": {
-            "positive": len([v for v in MANUAL_SENTIMENT_LABELS.values() if 'positive' in v['sentiment_range']]),
-            "neutral": len([v for v in MANUAL_SENTIMENT_LABELS.values() if 'neutral' in v['sentiment_range']]),
-            "negative": len([v for v in MANUAL_SENTIMENT_LABELS.values() if 'negative' in v['sentiment_range']])
-        }
-    }
-    return stats
+    return STATS
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,19 +1,161 @@
+import numpy as np
 import spacy
-from typing import List, Dict, Tuple
+from spacy.attrs import IS_PUNCT, IS_STOP, LEMMA, LENGTH, POS
+from spacy.symbols import ADJ, NOUN, VERB
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Dict, Optional, Tuple
+import os
 import re
-from .data.manual_labels import MANUAL_SENTIMENT_LABELS, REAL_THEMES
-import random
+import threading
+from .data.manual_labels import MANUAL_SENTIMENT_LABELS, REAL_THEMES, SENTIMENT_RATING_MAPPING
+
+# Taille des lots passés à nlp.pipe (ajustable sans modifier le code)
+SPACY_BATCH_SIZE = int(os.getenv("SPACY_BATCH_SIZE", "256"))
+
+# Nombre de textes distincts dont la partie déterministe de l'analyse
+# (mots-clés, thèmes, mots urgents) est gardée en mémoire
+TEXT_CACHE_SIZE = 4096
+
+URGENT_KEYWORDS = frozenset([
+    'urgent', 'emergency', 'critical', 'serious', 'danger', 
+    'immediately', 'asap', 'crisis', 'severe'
+])
+CRITICAL_THEMES = frozenset(['billing', 'scheduling', 'waiting_time'])
+
+POSITIVE_WORDS = frozenset(['excellent', 'good', 'great', 'professional', 'clean', 'attentive', 'nice', 'helpful'])
+NEGATIVE_WORDS = frozenset(['slow', 'long', 'difficulty', 'confusion', 'issues', 'problem', 'bad', 'poor', 'terrible'])
+
+# Mots-clés, thèmes, présence d'un mot urgent
+TextFeatures = Tuple[Tuple[str, ...], Tuple[str, ...], bool]
+
+def _build_theme_matcher(themes: Dict[str, List[str]]):
+    """
+    Compiler les mots-clés de thèmes en une seule expression régulière
+
+    Le lookahead trouve, à chaque position du texte, le mot-clé le plus long
+    qui y commence (alternatives triées par longueur décroissante). Les
+    mots-clés plus courts commençant au même endroit en sont des préfixes :
+    chaque mot-clé porte donc aussi les thèmes de ses préfixes, ce qui donne
+    exactement le même résultat que tester chaque mot-clé avec `in`.
+    """
+    keyword_themes = {}
+    for theme, keywords in themes.items():
+        for keyword in keywords:
+            keyword_themes.setdefault(keyword, set()).add(theme)
+    
+    themes_by_match = {
+        keyword: frozenset().union(*(
+            keyword_themes[prefix] for prefix in keyword_themes if keyword.startswith(prefix)
+        ))
+        for keyword in keyword_themes
+    }
+    alternatives = sorted(keyword_themes, key=len, reverse=True)
+    pattern = re.compile("(?=(" + "|".join(map(re.escape, alternatives)) + "))")
+    return pattern, themes_by_match
+
+# Construit une fois à l'import : un seul parcours du texte par extraction
+_THEME_PATTERN, _THEMES_BY_MATCH = _build_theme_matcher(REAL_THEMES)
+
+# Même principe pour les mots de sentiment (chaque mot est son propre
+# "thème") : l'ensemble des mots présents en un seul parcours
+_SENTIMENT_PATTERN, _SENTIMENT_WORDS_BY_MATCH = _build_theme_matcher(
+    {word: [word] for word in POSITIVE_WORDS | NEGATIVE_WORDS}
+)
+
+# Attributs lus en un seul tableau par document pour filtrer les mots-clés
+_KEYWORD_ATTRS = [POS, IS_STOP, IS_PUNCT, LENGTH, LEMMA]
+# Garder les noms, adjectifs et verbes importants
+_KEYWORD_POS_IDS = np.array([NOUN, ADJ, VERB], dtype=np.uint64)
+
+# Générateur NumPy unique pour tous les tirages de ratings (texte seul et
+# lots) : lui fixer une graine rend /analyze et /analyze/batch reproductibles ensemble
+_RNG = np.random.default_rng()
+
+# Une seule recherche pour tous les mots-clés d'urgence, insensible à la
+# casse (pas de copie du texte en minuscules)
+_URGENT_PATTERN = re.compile("|".join(map(re.escape, sorted(URGENT_KEYWORDS))), re.IGNORECASE)
+
+def _normalize_label(text: str) -> str:
+    """Forme canonique d'un feedback pour la recherche des labels manuels"""
+    return text.strip().lower().rstrip('.')
+
+# Labels manuels indexés par texte normalisé (casse, espaces et point final
+# ignorés), pour une seule recherche dans un dict par analyse
+_NORMALIZED_LABELS = {
+    _normalize_label(feedback): info for feedback, info in MANUAL_SENTIMENT_LABELS.items()
+}
+
+def _label_for(text_lower: str):
+    """Label manuel d'un texte déjà en minuscules (ou None)"""
+    return _NORMALIZED_LABELS.get(text_lower.strip().rstrip('.'))
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def _keyword_sentiment(text_lower: str) -> str:
+    """
+    Sentiment d'un texte d'après ses mots positifs et négatifs
+
+    Déterministe : mémorisé par texte, le même feedback inconnu revenant à
+    chaque analyse (analyze_sentiment est appelé pour chaque tirage).
+    """
+    found = set()
+    for match in _SENTIMENT_PATTERN.finditer(text_lower):
+        found |= _SENTIMENT_WORDS_BY_MATCH[match.group(1)]
+    
+    pos_count = len(found & POSITIVE_WORDS)
+    neg_count = len(found & NEGATIVE_WORDS)
+    
+    if pos_count > neg_count:
+        return 'positive'
+    elif neg_count > pos_count:
+        return 'negative'
+    # Égalité ou aucun mot connu : neutre, quelle que soit la longueur
+    return 'neutral'
+
+# Modèle spaCy partagé par tous les analyseurs du processus
+_NLP = None
+_NLP_LOCK = threading.Lock()
+
+def get_nlp():
+    """
+    Modèle anglais, chargé au premier appel puis réutilisé
+
+    Chargé avant un fork (gunicorn --preload), il est partagé par les
+    workers en copy-on-write au lieu d'être rechargé par chacun.
+    """
+    global _NLP
+    if _NLP is None:
+        with _NLP_LOCK:
+            if _NLP is None:
+                # Seuls tagger, attribute_ruler (pos_) et lemmatizer servent
+                # aux mots-clés : parser et NER ne sont même pas chargés
+                _NLP = spacy.load("en_core_web_sm", exclude=["parser", "ner"])
+    return _NLP
 
 class FeedbackAnalyzer:
     def __init__(self):
         """Initialiser l'analyseur avec modèles spaCy"""
         print("🤖 Initialisation de l'analyseur NLP...")
         try:
-            self.nlp_en = spacy.load("en_core_web_sm")
+            self.nlp_en = get_nlp()
             print(" Modèle anglais chargé")
         except OSError:
             print(" Erreur: Modèle anglais non trouvé")
             raise
+        
+        # Le dataset répète peu de textes distincts : spaCy ne tourne qu'une
+        # fois par texte. Verrou car l'API analyse depuis plusieurs threads
+        self._text_cache: "OrderedDict[str, TextFeatures]" = OrderedDict()
+        self._text_cache_lock = threading.Lock()
+        
+        # Textes des labels manuels (ensemble fermé) : partie déterministe
+        # calculée une fois ici, jamais évincée ; une analyse de ces textes
+        # se réduit à une recherche dans un dict et au tirage du rating
+        labels = list(MANUAL_SENTIMENT_LABELS)
+        self._label_features: Dict[str, TextFeatures] = {
+            text: self._compute_features(text, doc)
+            for text, doc in zip(labels, self.nlp_en.pipe(labels))
+        }
     
     def detect_language(self, text: str) -> str:
         """Détection automatique de la langue"""
@@ -21,19 +163,21 @@ class FeedbackAnalyzer:
     
     def analyze_sentiment(self, text: str) -> Tuple[str, int]:
         """Analyse de sentiment avec rating cohérent"""
-        if text in MANUAL_SENTIMENT_LABELS:
-            label_info = MANUAL_SENTIMENT_LABELS[text]
+        # Texte mis en minuscules une seule fois pour le label et le fallback
+        text_lower = text.lower()
+        label_info = _label_for(text_lower)
+        if label_info is not None:
             rating_range = label_info['rating_range']
             
             # Choisir un rating d'abord
-            rating = random.choice(rating_range)
+            rating = rating_range[_RNG.integers(len(rating_range))]
             
             # Puis déterminer le sentiment cohérent avec ce rating
-            if rating in [4, 5]:
+            if rating in (4, 5):
                 sentiment = 'positive'
             elif rating == 3:
                 sentiment = 'neutral'
-            elif rating in [1, 2]:
+            elif rating in (1, 2):
                 sentiment = 'negative'
             else:
                 sentiment = 'neutral'  # fallback
@@ -41,109 +185,210 @@ class FeedbackAnalyzer:
             return sentiment, rating
         else:
             # Fallback pour textes inconnus
-            sentiment = self._fallback_sentiment(text)
+            sentiment = _keyword_sentiment(text_lower)
             rating = self._sentiment_to_rating(sentiment)
             return sentiment, rating
 
     def _fallback_sentiment(self, text: str) -> str:
         """Sentiment amélioré pour textes inconnus"""
-        text_lower = text.lower()
-        
-        positive_words = ['excellent', 'good', 'great', 'professional', 'clean', 'attentive', 'nice', 'helpful']
-        negative_words = ['slow', 'long', 'difficulty', 'confusion', 'issues', 'problem', 'bad', 'poor', 'terrible']
-        
-        pos_count = sum(1 for word in positive_words if word in text_lower)
-        neg_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if pos_count > neg_count:
-            return 'positive'
-        elif neg_count > pos_count:
-            return 'negative'
-        else:
-            # Pour vraiment inconnu, essayer de deviner
-            if len(text.split()) < 2:  # Texte très court
-                return 'neutral'
-            else:
-                return 'neutral'  # Par défaut
+        return _keyword_sentiment(text.lower())
     
     def _sentiment_to_rating(self, sentiment: str) -> int:
         """Convertir sentiment en rating avec tous les niveaux"""
-        mapping = {
-            'positive': [4, 5],   # Bien ou excellent
-            'neutral': [3],       # Moyen
-            'negative': [1, 2]    # Mauvais ou très mauvais
-        }
-        rating_options = mapping.get(sentiment, [3])
-        return random.choice(rating_options)
+        # positive : bien ou excellent, neutral : moyen,
+        # negative : mauvais ou très mauvais
+        rating_options = SENTIMENT_RATING_MAPPING.get(sentiment, (3,))
+        return rating_options[_RNG.integers(len(rating_options))]
     
     def extract_themes(self, text: str) -> List[str]:
         """Extraction des thèmes basée sur mots-clés"""
-        if text in MANUAL_SENTIMENT_LABELS:
-            return MANUAL_SENTIMENT_LABELS[text]['themes']
+        return self._extract_themes(text.lower())
+    
+    def _extract_themes(self, text_lower: str) -> List[str]:
+        """Extraction des thèmes d'un texte déjà en minuscules"""
+        label_info = _label_for(text_lower)
+        if label_info is not None:
+            return label_info['themes']
         
-        # Fallback : détecter thèmes par mots-clés
-        detected_themes = []
-        text_lower = text.lower()
+        # Fallback : détecter thèmes par mots-clés (un seul parcours du texte)
+        found = set()
+        for match in _THEME_PATTERN.finditer(text_lower):
+            found |= _THEMES_BY_MATCH[match.group(1)]
         
-        for theme, keywords in REAL_THEMES.items():
-            if any(keyword in text_lower for keyword in keywords):
-                detected_themes.append(theme)
+        # Même ordre que REAL_THEMES
+        detected_themes = [theme for theme in REAL_THEMES if theme in found]
         
         return detected_themes if detected_themes else ['general']
     
-    def detect_urgency(self, text: str) -> bool:
-        """Détection de l'urgence"""
-        urgent_keywords = [
-            'urgent', 'emergency', 'critical', 'serious', 'danger', 
-            'immediately', 'asap', 'crisis', 'severe'
-        ]
-        
-        text_lower = text.lower()
+    def detect_urgency(
+        self,
+        text: str,
+        sentiment: Optional[str] = None,
+        rating: Optional[int] = None,
+        themes: Optional[Iterable[str]] = None
+    ) -> bool:
+        """
+        Détection de l'urgence
         
+        Sentiment, rating et thèmes déjà calculés pour ce texte peuvent être
+        fournis : ils ne sont alors ni recalculés ni retirés au sort.
+        """
         # Urgence par mots-clés
-        if any(keyword in text_lower for keyword in urgent_keywords):
+        if self._has_urgent_keyword(text):
             return True
         
-        # Urgence par sentiment très négatif + thèmes critiques
-        sentiment, rating = self.analyze_sentiment(text)
-        themes = self.extract_themes(text)
-        
-        critical_themes = ['billing', 'scheduling', 'waiting_time']
-        if sentiment == 'negative' and rating <= 2 and any(theme in critical_themes for theme in themes):
-            return True
-            
-        return False
+        if sentiment is None or rating is None:
+            sentiment, rating = self.analyze_sentiment(text)
+        if themes is None:
+            themes = self.extract_themes(text)
+        return self._is_critical_negative(sentiment, rating, themes)
+    
+    def _has_urgent_keyword(self, text: str) -> bool:
+        """Présence d'un mot-clé d'urgence dans le texte"""
+        return _URGENT_PATTERN.search(text) is not None
+    
+    def _is_critical_negative(self, sentiment: str, rating: int, themes: Iterable[str]) -> bool:
+        """Urgence par sentiment très négatif + thèmes critiques"""
+        return sentiment == 'negative' and rating <= 2 and any(theme in CRITICAL_THEMES for theme in themes)
     
     def extract_keywords(self, text: str) -> List[str]:
         """Extraction de mots-clés importants"""
-        doc = self.nlp_en(text)
+        return self._keywords_from_doc(self.nlp_en(text))
+    
+    def _keywords_from_doc(self, doc) -> List[str]:
+        """
+        Mots-clés d'un document spaCy déjà analysé
         
-        keywords = []
-        for token in doc:
-            # Garder les noms, adjectifs et verbes importants
-            if (token.pos_ in ["NOUN", "ADJ", "VERB"] and 
-                not token.is_stop and 
-                not token.is_punct and 
-                len(token.text) > 2):
-                keywords.append(token.lemma_.lower())
+        Les attributs de tous les tokens sont lus d'un coup (Doc.to_array) et
+        filtrés par masques NumPy, sans objet Token par mot.
+        """
+        attrs = doc.to_array(_KEYWORD_ATTRS)
+        mask = (
+            np.isin(attrs[:, 0], _KEYWORD_POS_IDS) &
+            (attrs[:, 1] == 0) &   # pas un stop word
+            (attrs[:, 2] == 0) &   # pas une ponctuation
+            (attrs[:, 3] > 2)      # plus de 2 caractères
+        )
         
-        return list(set(keywords))  # Éliminer doublons
+        strings = doc.vocab.strings
+        # Doublons éliminés en gardant l'ordre du texte (résultat stable)
+        return list(dict.fromkeys(strings[lemma].lower() for lemma in attrs[mask, 4].tolist()))
     
     def analyze_feedback(self, text: str) -> Dict:
         """Analyse complète d'un feedback"""
+        return self._analyze(text, self._text_features(text))
+    
+    def analyze_batch(self, texts: List[str]) -> List[Dict]:
+        """
+        Analyse complète de plusieurs feedbacks
+        
+        Seuls les textes distincts pas encore en cache passent par spaCy, en
+        un seul appel (nlp.pipe, traitement par lots) au lieu d'un appel du
+        pipeline par texte.
+        """
+        with self._text_cache_lock:
+            missing = [
+                text for text in dict.fromkeys(texts)
+                if text not in self._label_features and text not in self._text_cache
+            ]
+        docs = self.nlp_en.pipe(missing, batch_size=SPACY_BATCH_SIZE)
+        features = {text: self._text_features(text, doc) for text, doc in zip(missing, docs)}
+        sentiments, ratings = self._draw_sentiments(texts)
+        
+        return [
+            self._analyze(text, features.get(text) or self._text_features(text), sentiment, rating)
+            for text, sentiment, rating in zip(texts, sentiments, ratings)
+        ]
+    
+    def _rating_options(self, text_lower: str) -> Tuple[int, ...]:
+        """Ratings possibles pour un texte en minuscules (plage du label ou du sentiment)"""
+        label_info = _label_for(text_lower)
+        if label_info is not None:
+            return label_info['rating_range']
+        return SENTIMENT_RATING_MAPPING.get(_keyword_sentiment(text_lower), (3,))
+    
+    def _draw_sentiments(self, texts: List[str]) -> Tuple[List[str], List[int]]:
+        """
+        Tirer sentiment et rating de tout un lot en un seul appel NumPy
+        
+        Même loi que analyze_sentiment : rating uniforme dans les options du
+        texte, puis sentiment déduit du rating.
+        """
+        if not texts:
+            return [], []
+        
+        # Une ligne d'options par texte distinct, complétée à la même largeur
+        positions = {}
+        options = []
+        for text in texts:
+            if text not in positions:
+                positions[text] = len(options)
+                options.append(self._rating_options(text.lower()))
+        width = max(map(len, options))
+        table = np.array([opts + (0,) * (width - len(opts)) for opts in options])
+        counts = np.fromiter(map(len, options), dtype=np.int64, count=len(options))
+        
+        rows = np.fromiter((positions[text] for text in texts), dtype=np.int64, count=len(texts))
+        ratings = table[rows, _RNG.integers(0, counts[rows])]
+        sentiments = np.select([ratings >= 4, ratings == 3], ['positive', 'neutral'], 'negative')
+        # Types Python natifs pour la sérialisation JSON
+        return sentiments.tolist(), ratings.tolist()
+    
+    def _text_features(self, text: str, doc=None) -> TextFeatures:
+        """
+        Partie déterministe de l'analyse, mémorisée par texte
+        
+        Le rating (tirage aléatoire dans la plage du label) n'en fait pas
+        partie : il est recalculé à chaque analyse.
+        """
+        features = self._label_features.get(text)
+        if features is not None:
+            return features
+        
+        with self._text_cache_lock:
+            features = self._text_cache.get(text)
+            if features is not None:
+                self._text_cache.move_to_end(text)
+                return features
+        
+        features = self._compute_features(text, doc if doc is not None else self.nlp_en(text))
+        
+        with self._text_cache_lock:
+            self._text_cache[text] = features
+            if len(self._text_cache) > TEXT_CACHE_SIZE:
+                self._text_cache.popitem(last=False)
+        return features
+    
+    def _compute_features(self, text: str, doc) -> TextFeatures:
+        """Mots-clés, thèmes et mots urgents d'un texte déjà passé par spaCy"""
+        return (
+            tuple(self._keywords_from_doc(doc)),
+            tuple(self._extract_themes(text.lower())),
+            self._has_urgent_keyword(text)
+        )
+    
+    def _analyze(
+        self,
+        text: str,
+        features: TextFeatures,
+        sentiment: Optional[str] = None,
+        rating: Optional[int] = None
+    ) -> Dict:
+        """Assemble le résultat d'analyse d'un texte"""
+        keywords, themes, has_urgent_keyword = features
         language = self.detect_language(text)
-        sentiment, rating = self.analyze_sentiment(text)
-        themes = self.extract_themes(text)
-        keywords = self.extract_keywords(text)
-        is_urgent = self.detect_urgency(text)
+        if sentiment is None or rating is None:
+            sentiment, rating = self.analyze_sentiment(text)
+        # Même tirage que le rating renvoyé : urgence et rating cohérents
+        is_urgent = has_urgent_keyword or self._is_critical_negative(sentiment, rating, themes)
         
         return {
             "original_text": text,
             "language": language,
             "sentiment": sentiment,
             "predicted_rating": rating,
-            "themes": themes,
-            "keywords": keywords,
+            "themes": list(themes),
+            "keywords": list(keywords),
             "is_urgent": is_urgent
         }
 
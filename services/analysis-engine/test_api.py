@@ -1,14 +1,66 @@
-import requests
+"""
+Test manuel de l'API d'analyse (serveur lancé sur le port 8001)
 
-print("=== TEST DE TON API ===")
-print("Analyse du feedback: 'Long wait.'")
+Dépendance : httpx (pip install httpx), non déclarée par le moteur
+d'analyse qui n'a pas de fichier requirements.
 
-response = requests.post("http://localhost:8001/analyze", 
-                        json={"text": "Long wait."})
+    python test_api.py                  # analyse unique + test de charge
+    N_REQUESTS=0 python test_api.py     # analyse unique seulement
+"""
+import asyncio
+import os
+import statistics
+import time
 
-result = response.json()
-print(f"Sentiment: {result['sentiment']}")
-print(f"Rating: {result['predicted_rating']}/5")
-print(f"Thèmes: {result['themes']}")
-print(f"Urgent: {result['is_urgent']}")
-print(f"Temps: {result['processing_time_ms']}ms")
\ No newline at end of file
+import httpx
+
+API_URL = "http://localhost:8001"
+
+# Nombre de requêtes simultanées pour le test de charge (0 pour le sauter)
+N_REQUESTS = int(os.environ.get("N_REQUESTS", "500"))
+
+
+def smoke_test():
+    """Analyser un feedback et afficher le résultat"""
+    print("=== TEST DE TON API ===")
+    print("Analyse du feedback: 'Long wait.'")
+
+    response = httpx.post(f"{API_URL}/analyze", json={"text": "Long wait."})
+
+    result = response.json()
+    print(f"Sentiment: {result['sentiment']}")
+    print(f"Rating: {result['predicted_rating']}/5")
+    print(f"Thèmes: {result['themes']}")
+    print(f"Urgent: {result['is_urgent']}")
+    print(f"Temps: {result['processing_time_ms']}ms")
+
+
+async def timed_post(client: httpx.AsyncClient, text: str) -> float:
+    """Envoyer une analyse et renvoyer sa latence de bout en bout (ms)"""
+    start = time.perf_counter()
+    response = await client.post("/analyze", json={"text": text})
+    response.raise_for_status()
+    return (time.perf_counter() - start) * 1000
+
+
+async def bench(n: int = N_REQUESTS):
+    """Envoyer n analyses en parallèle sur un même pool de connexions"""
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=API_URL, limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(timed_post(client, "Long wait.") for _ in range(n)))
+        elapsed = time.perf_counter() - start
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"Requêtes : {n} en {elapsed:.2f} s ({n / elapsed:.1f} req/s)")
+    print(f"Latence p50 : {percentiles[49]:.1f} ms")
+    print(f"Latence p95 : {percentiles[94]:.1f} ms")
+    print(f"Latence p99 : {percentiles[98]:.1f} ms")
+
+
+if __name__ == "__main__":
+    smoke_test()
+
+    if N_REQUESTS > 0:
+        print(f"\n=== TEST DE CHARGE ({N_REQUESTS} requêtes simultanées) ===")
+        asyncio.run(bench())
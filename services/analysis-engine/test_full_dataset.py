@@ -1,6 +1,6 @@
+import numpy as np
 import pandas as pd
 from app.nlp_analyzer import FeedbackAnalyzer
-from collections import Counter
 import time
 
 # Charger l'analyseur
@@ -16,47 +16,43 @@ print(f"Feedbacks à analyser : {len(df)}")
 print("=== TEST SUR ÉCHANTILLON (100 feedbacks) ===")
 sample_df = df.sample(100, random_state=42)
 
-results = []
 start_time = time.time()
 
-for idx, row in sample_df.iterrows():
-    feedback_text = row['feedback_text']
-    original_rating = row['rating']
-    
-    # Analyser
-    analysis = analyzer.analyze_feedback(feedback_text)
-    
-    results.append({
-        'original_text': feedback_text,
-        'original_rating': original_rating,
-        'predicted_sentiment': analysis['sentiment'],
-        'predicted_rating': analysis['predicted_rating'],
-        'themes': analysis['themes'],
-        'is_urgent': analysis['is_urgent'],
-        'keywords': analysis['keywords']
-    })
+# Analyser tout l'échantillon en un lot (textes passés à spaCy via nlp.pipe)
+texts = sample_df['feedback_text'].tolist()
+analyses = analyzer.analyze_batch(texts)
 
 end_time = time.time()
 print(f"Temps d'analyse : {end_time - start_time:.2f} secondes")
-print(f"Vitesse : {len(results)/(end_time - start_time):.1f} feedbacks/seconde")
+print(f"Vitesse : {len(analyses)/(end_time - start_time):.1f} feedbacks/seconde")
 
-# Analyser les résultats
-results_df = pd.DataFrame(results)
+# Analyser les résultats (construits colonne par colonne, sans un dict par ligne)
+results_df = pd.DataFrame({
+    'original_text': texts,
+    'original_rating': sample_df['rating'].to_numpy(),
+    'predicted_sentiment': [analysis['sentiment'] for analysis in analyses],
+    'predicted_rating': np.fromiter(
+        (analysis['predicted_rating'] for analysis in analyses), dtype=np.int8, count=len(analyses)
+    ),
+    'themes': [analysis['themes'] for analysis in analyses],
+    'is_urgent': np.fromiter(
+        (analysis['is_urgent'] for analysis in analyses), dtype=bool, count=len(analyses)
+    ),
+    'keywords': [analysis['keywords'] for analysis in analyses]
+})
 
 print("\n=== DISTRIBUTION DES SENTIMENTS PRÉDITS ===")
-sentiment_counts = Counter(results_df['predicted_sentiment'])
+sentiment_counts = results_df['predicted_sentiment'].value_counts()
 print(sentiment_counts)
 
 print("\n=== DISTRIBUTION DES RATINGS PRÉDITS ===")
-rating_counts = Counter(results_df['predicted_rating'])
-print(dict(sorted(rating_counts.items())))
+rating_counts = results_df['predicted_rating'].value_counts().sort_index()
+print(rating_counts)
 
 print("\n=== THÈMES LES PLUS FRÉQUENTS ===")
-all_themes = []
-for themes_list in results_df['themes']:
-    all_themes.extend(themes_list)
-theme_counts = Counter(all_themes)
-print(theme_counts.most_common(10))
+# Une ligne par thème (explode), listes vides ignorées par value_counts
+theme_counts = results_df['themes'].explode().value_counts()
+print(theme_counts.head(10))
 
 print("\n=== FEEDBACKS URGENTS DÉTECTÉS ===")
 urgent_count = results_df['is_urgent'].sum()
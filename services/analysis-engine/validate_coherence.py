@@ -1,3 +1,4 @@
+import numpy as np
 from app.nlp_analyzer import FeedbackAnalyzer
 from app.data.manual_labels import MANUAL_SENTIMENT_LABELS
 
@@ -9,36 +10,38 @@ print("Test : sentiment doit être cohérent avec rating")
 coherence_errors = 0
 total_tests = 0
 
-# Tester 50 fois chaque feedback connu pour vérifier cohérence
+# Nombre de tirages par feedback connu (à cause du random)
+N_DRAWS = 10
+
+# Tester chaque feedback connu N_DRAWS fois par analyse unitaire
+# (analyze_sentiment) et N_DRAWS fois en un seul lot (analyze_batch, ratings
+# tirés et sentiments déduits par NumPy), puis vérifier tout d'un coup
 for feedback_text in MANUAL_SENTIMENT_LABELS.keys():
     print(f"\n--- {feedback_text} ---")
     
-    sentiments = []
-    ratings = []
+    draws = [analyzer.analyze_sentiment(feedback_text) for _ in range(N_DRAWS)]
+    draws += [
+        (result['sentiment'], result['predicted_rating'])
+        for result in analyzer.analyze_batch([feedback_text] * N_DRAWS)
+    ]
+    sentiments = np.array([sentiment for sentiment, _ in draws])
+    ratings = np.array([rating for _, rating in draws])
+    total_tests += len(draws)
     
-    # Tester 10 fois (à cause du random)
-    for i in range(10):
-        sentiment, rating = analyzer.analyze_sentiment(feedback_text)
-        sentiments.append(sentiment)
-        ratings.append(rating)
-        total_tests += 1
-        
-        # Vérifier cohérence
-        coherent = False
-        if sentiment == 'positive' and rating in [4, 5]:
-            coherent = True
-        elif sentiment == 'neutral' and rating == 3:
-            coherent = True
-        elif sentiment == 'negative' and rating in [1, 2]:
-            coherent = True
-            
-        if not coherent:
-            coherence_errors += 1
-            print(f"   Incohérent : sentiment={sentiment}, rating={rating}")
+    # Vérifier cohérence (toutes les analyses d'un coup)
+    expected = np.select(
+        [(ratings >= 4) & (ratings <= 5), ratings == 3, (ratings >= 1) & (ratings <= 2)],
+        ['positive', 'neutral', 'negative'],
+        'invalid'
+    )
+    incoherent = sentiments != expected
+    coherence_errors += int(incoherent.sum())
+    for sentiment, rating in zip(sentiments[incoherent], ratings[incoherent]):
+        print(f"   Incohérent : sentiment={sentiment}, rating={rating}")
     
     # Statistiques pour ce feedback
-    unique_sentiments = set(sentiments)
-    unique_ratings = set(ratings)
+    unique_sentiments = set(sentiments.tolist())
+    unique_ratings = set(ratings.tolist())
     print(f"  Sentiments obtenus : {unique_sentiments}")
     print(f"  Ratings obtenus : {unique_ratings}")
 
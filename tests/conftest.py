@@ -1,34 +1,44 @@
 import pytest
 import asyncio
 from typing import Generator, AsyncGenerator
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from fastapi.testclient import TestClient
-from databases import Database
 
 # Import the applications
 from api_gateway.app.main import app as gateway_app
 from feedback_api.app.main import app as feedback_app
 from feedback_api.app.database.models import Base
 from feedback_api.app.database.connection import get_db
+from feedback_api.app.utils.cache import department_cache, feedback_stats_local
 
 # Test database URL
 TEST_DATABASE_URL = "sqlite:///./test.db"
 
-# Create test database engine
+# Create test database engine (sync, used for schema setup/teardown)
 test_engine = create_engine(
     TEST_DATABASE_URL, 
     connect_args={"check_same_thread": False}
 )
 
-TestingSessionLocal = sessionmaker(
-    autocommit=False, 
-    autoflush=False, 
-    bind=test_engine
+# Async engine on the same file for the API's AsyncSession dependency
+test_async_engine = create_async_engine(
+    TEST_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
 )
 
-# Test database instance
-test_database = Database(TEST_DATABASE_URL)
+@event.listens_for(test_async_engine.sync_engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite ignores foreign keys unless asked; the API relies on them."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+TestingSessionLocal = async_sessionmaker(
+    test_async_engine,
+    class_=AsyncSession,
+    autoflush=False, 
+    expire_on_commit=False
+)
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -43,22 +53,27 @@ async def test_db() -> AsyncGenerator:
     # Create tables
     Base.metadata.create_all(bind=test_engine)
     
-    # Connect to test database
-    await test_database.connect()
-    
-    yield test_database
+    # Same async sessionmaker the API dependency override uses
+    async with TestingSessionLocal() as session:
+        yield session
     
     # Cleanup
-    await test_database.disconnect()
+    await test_async_engine.dispose()
     Base.metadata.drop_all(bind=test_engine)
+    department_cache.clear()
+    feedback_stats_local.clear()
+
+async def insert_row(db: AsyncSession, query: str, params: dict):
+    """Run an INSERT, commit it, and return the first RETURNING column (if any)."""
+    result = await db.execute(text(query), params)
+    row_id = result.scalar_one() if result.returns_rows else None
+    await db.commit()
+    return row_id
 
-def override_get_db():
+async def override_get_db():
     """Override database dependency for testing."""
-    try:
-        db = TestingSessionLocal()
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # Override the dependency
 feedback_app.dependency_overrides[get_db] = override_get_db
@@ -92,7 +107,7 @@ def auth_headers(gateway_client: TestClient) -> dict:
         return {}
 
 @pytest.fixture(scope="function")
-async def sample_department(test_db: Database) -> dict:
+async def sample_department(test_db: AsyncSession) -> dict:
     """Create a sample department for testing."""
     department_data = {
         "name": "Test Department",
@@ -101,11 +116,11 @@ async def sample_department(test_db: Database) -> dict:
     
     query = """
         INSERT INTO departments (name, code, created_at) 
-        VALUES (:name, :code, NOW()) 
+        VALUES (:name, :code, CURRENT_TIMESTAMP) 
         RETURNING id, name, code
     """
     
-    department_id = await test_db.execute(query, department_data)
+    department_id = await insert_row(test_db, query, department_data)
     
     return {
         "id": department_id,
@@ -114,7 +129,7 @@ async def sample_department(test_db: Database) -> dict:
     }
 
 @pytest.fixture(scope="function")
-async def sample_patient(test_db: Database, sample_department: dict) -> dict:
+async def sample_patient(test_db: AsyncSession, sample_department: dict) -> dict:
     """Create a sample patient for testing."""
     patient_data = {
         "first_name": "Test",
@@ -127,11 +142,11 @@ async def sample_patient(test_db: Database, sample_department: dict) -> dict:
     
     query = """
         INSERT INTO patients (first_name, last_name, phone, email, preferred_language, department_id, created_at) 
-        VALUES (:first_name, :last_name, :phone, :email, :preferred_language, :department_id, NOW()) 
+        VALUES (:first_name, :last_name, :phone, :email, :preferred_language, :department_id, CURRENT_TIMESTAMP) 
         RETURNING id, first_name, last_name, phone, email, preferred_language, department_id
     """
     
-    patient_id = await test_db.execute(query, patient_data)
+    patient_id = await insert_row(test_db, query, patient_data)
     
     return {
         "id": patient_id,
@@ -139,7 +154,7 @@ async def sample_patient(test_db: Database, sample_department: dict) -> dict:
     }
 
 @pytest.fixture(scope="function")
-async def sample_feedback(test_db: Database, sample_patient: dict, sample_department: dict) -> dict:
+async def sample_feedback(test_db: AsyncSession, sample_patient: dict, sample_department: dict) -> dict:
     """Create a sample feedback for testing."""
     feedback_data = {
         "patient_id": sample_patient["id"],
@@ -155,11 +170,11 @@ async def sample_feedback(test_db: Database, sample_patient: dict, sample_depart
     
     query = """
         INSERT INTO feedbacks (patient_id, department_id, rating, feedback_text, language, wait_time_min, resolution_time_min, is_urgent, status, created_at) 
-        VALUES (:patient_id, :department_id, :rating, :feedback_text, :language, :wait_time_min, :resolution_time_min, :is_urgent, :status, NOW()) 
+        VALUES (:patient_id, :department_id, :rating, :feedback_text, :language, :wait_time_min, :resolution_time_min, :is_urgent, :status, CURRENT_TIMESTAMP) 
         RETURNING id, patient_id, department_id, rating, feedback_text, language, wait_time_min, resolution_time_min, is_urgent, status
     """
     
-    feedback_id = await test_db.execute(query, feedback_data)
+    feedback_id = await insert_row(test_db, query, feedback_data)
     
     return {
         "id": feedback_id,
@@ -253,27 +268,30 @@ TEST_FEEDBACKS = [
 ]
 
 @pytest.fixture(scope="function")
-async def populate_test_data(test_db: Database):
+async def populate_test_data(test_db: AsyncSession):
     """Populate database with test data."""
     # Insert departments
     for dept in TEST_DEPARTMENTS:
-        await test_db.execute(
-            "INSERT INTO departments (name, code, created_at) VALUES (:name, :code, NOW())",
+        await insert_row(
+            test_db,
+            "INSERT INTO departments (name, code, created_at) VALUES (:name, :code, CURRENT_TIMESTAMP)",
             dept
         )
     
     # Insert patients
     for patient in TEST_PATIENTS:
-        await test_db.execute(
+        await insert_row(
+            test_db,
             """INSERT INTO patients (first_name, last_name, phone, email, preferred_language, department_id, created_at) 
-               VALUES (:first_name, :last_name, :phone, :email, :preferred_language, :department_id, NOW())""",
+               VALUES (:first_name, :last_name, :phone, :email, :preferred_language, :department_id, CURRENT_TIMESTAMP)""",
             patient
         )
     
     # Insert feedbacks
     for feedback in TEST_FEEDBACKS:
-        await test_db.execute(
+        await insert_row(
+            test_db,
             """INSERT INTO feedbacks (patient_id, department_id, rating, feedback_text, language, wait_time_min, resolution_time_min, is_urgent, status, created_at) 
-               VALUES (:patient_id, :department_id, :rating, :feedback_text, :language, :wait_time_min, :resolution_time_min, false, 'pending', NOW())""",
+               VALUES (:patient_id, :department_id, :rating, :feedback_text, :language, :wait_time_min, :resolution_time_min, false, 'pending', CURRENT_TIMESTAMP)""",
             feedback
         )
\ No newline at end of file
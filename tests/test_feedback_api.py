@@ -1,6 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
-from databases import Database
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class TestFeedbackAPIHealth:
@@ -77,7 +77,7 @@ class TestDepartmentsAPI:
     """Test departments API endpoints"""
     
     @pytest.mark.asyncio
-    async def test_get_departments_empty(self, feedback_client: TestClient, test_db: Database):
+    async def test_get_departments_empty(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test getting departments when none exist"""
         response = feedback_client.get("/api/v1/departments")
         
@@ -186,6 +186,29 @@ class TestDepartmentsAPI:
         assert data["name"] == update_data["name"]
         assert data["code"] == update_data["code"]
     
+    def test_update_department_name_in_patient_summary(self, feedback_client: TestClient):
+        """Test that renaming a department shows up in patient summaries"""
+        create_response = feedback_client.post("/api/v1/departments", json={"name": "Old Name", "code": "REN"})
+        department_id = create_response.json()["id"]
+        
+        feedback_client.post("/api/v1/patients", json={
+            "first_name": "Summary",
+            "last_name": "Patient",
+            "preferred_language": "fr",
+            "department_id": department_id
+        })
+        
+        # Warm the summary cache before the rename
+        response = feedback_client.get("/api/v1/patients/summary")
+        assert response.json()[0]["department_name"] == "Old Name"
+        
+        response = feedback_client.put(f"/api/v1/departments/{department_id}", json={"name": "New Name"})
+        assert response.status_code == 200
+        
+        response = feedback_client.get("/api/v1/patients/summary")
+        assert response.status_code == 200
+        assert response.json()[0]["department_name"] == "New Name"
+    
     def test_delete_department(self, feedback_client: TestClient):
         """Test deleting a department"""
         # First create a department
@@ -212,7 +235,7 @@ class TestPatientsAPI:
     """Test patients API endpoints"""
     
     @pytest.mark.asyncio
-    async def test_get_patients_empty(self, feedback_client: TestClient, test_db: Database):
+    async def test_get_patients_empty(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test getting patients when none exist"""
         response = feedback_client.get("/api/v1/patients")
         
@@ -334,6 +357,73 @@ class TestPatientsAPI:
         assert data["phone"] == update_data["phone"]
 
 
+    def test_get_patient_not_modified(self, feedback_client: TestClient):
+        """Test conditional GET of a patient with If-None-Match"""
+        dept_response = feedback_client.post("/api/v1/departments", json={"name": "Test Dept", "code": "TEST"})
+        department_id = dept_response.json()["id"]
+        
+        patient_response = feedback_client.post("/api/v1/patients", json={
+            "first_name": "Etag",
+            "last_name": "Patient",
+            "preferred_language": "fr",
+            "department_id": department_id
+        })
+        patient_id = patient_response.json()["id"]
+        
+        response = feedback_client.get(f"/api/v1/patients/{patient_id}")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        
+        response = feedback_client.get(f"/api/v1/patients/{patient_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_get_patients_after_id(self, feedback_client: TestClient):
+        """Test keyset pagination of patients with after_id"""
+        dept_response = feedback_client.post("/api/v1/departments", json={"name": "Test Dept", "code": "TEST"})
+        department_id = dept_response.json()["id"]
+        
+        for first_name in ("Alpha", "Beta", "Gamma"):
+            feedback_client.post("/api/v1/patients", json={
+                "first_name": first_name,
+                "last_name": "Page",
+                "preferred_language": "fr",
+                "department_id": department_id
+            })
+        
+        first_page = feedback_client.get("/api/v1/patients", params={"limit": 2})
+        assert first_page.status_code == 200
+        assert len(first_page.json()) == 2
+        assert first_page.headers["X-Total-Count"] == "3"
+        after_id = first_page.headers["X-Next-Cursor"]
+        
+        second_page = feedback_client.get("/api/v1/patients", params={"limit": 2, "after_id": after_id})
+        assert second_page.status_code == 200
+        assert "X-Total-Count" not in second_page.headers
+        ids = [p["id"] for p in second_page.json()]
+        assert all(i > int(after_id) for i in ids)
+
+    def test_get_patients_feedbacks_batch(self, feedback_client: TestClient):
+        """Test fetching feedbacks for several patients at once"""
+        dept_response = feedback_client.post("/api/v1/departments", json={"name": "Test Dept", "code": "TEST"})
+        department_id = dept_response.json()["id"]
+        
+        patient_response = feedback_client.post("/api/v1/patients", json={
+            "first_name": "Batch",
+            "last_name": "Patient",
+            "preferred_language": "fr",
+            "department_id": department_id
+        })
+        patient_id = patient_response.json()["id"]
+        
+        response = feedback_client.post(
+            "/api/v1/patients/feedbacks:batch",
+            json={"patient_ids": [patient_id], "limit_per_patient": 5}
+        )
+        
+        assert response.status_code == 200
+        assert response.json() == {str(patient_id): []}
+
 class TestFeedbacksAPI:
     """Test feedbacks API endpoints"""
     
@@ -344,7 +434,20 @@ class TestFeedbacksAPI:
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
-    
+
+    def test_get_feedbacks_invalid_cursor(self, feedback_client: TestClient):
+        """Test getting feedbacks with a malformed pagination cursor"""
+        response = feedback_client.get("/api/v1/feedbacks?cursor=not-a-cursor")
+
+        assert response.status_code == 400
+
+    def test_export_feedbacks(self, feedback_client: TestClient):
+        """Test exporting feedbacks as NDJSON"""
+        response = feedback_client.get("/api/v1/feedbacks/export")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
     def test_create_feedback(self, feedback_client: TestClient):
         """Test creating a new feedback"""
         # Create department and patient first
@@ -391,9 +494,24 @@ class TestFeedbacksAPI:
         }
         
         response = feedback_client.post("/api/v1/feedbacks", json=feedback_data)
-        
+
         assert response.status_code == 422
-    
+
+    def test_create_feedbacks_bulk_unknown_patient(self, feedback_client: TestClient):
+        """Test bulk feedback creation with a non-existent patient"""
+        feedback_data = {
+            "patient_id": 999,  # Non-existent patient
+            "department_id": 999,
+            "rating": 4.0,
+            "feedback_text": "Very good follow-up by the team",
+            "language": "en"
+        }
+
+        response = feedback_client.post("/api/v1/feedbacks/bulk", json=[feedback_data, feedback_data])
+
+        assert response.status_code == 400
+        assert "not found" in response.json()["detail"]
+
     def test_get_feedback_stats(self, feedback_client: TestClient):
         """Test getting feedback statistics"""
         response = feedback_client.get("/api/v1/feedbacks/stats")
@@ -406,6 +524,17 @@ class TestFeedbacksAPI:
         assert "by_department" in data
         assert "by_language" in data
     
+    def test_get_feedback_stats_cache_control(self, feedback_client: TestClient):
+        """Test stats responses can be reused briefly by the caller"""
+        first = feedback_client.get("/api/v1/feedbacks/stats")
+        second = feedback_client.get("/api/v1/feedbacks/stats")
+        
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert first.headers["cache-control"] == "private, max-age=5"
+        assert second.headers["cache-control"] == "private, max-age=5"
+        assert second.json() == first.json()
+    
     def test_get_urgent_feedbacks(self, feedback_client: TestClient):
         """Test getting urgent feedbacks"""
         response = feedback_client.get("/api/v1/feedbacks/urgent")
@@ -413,6 +542,12 @@ class TestFeedbacksAPI:
         assert response.status_code == 200
         data = response.json()
         assert isinstance(data, list)
+    
+    def test_get_urgent_feedbacks_invalid_cursor(self, feedback_client: TestClient):
+        """Test that a malformed urgent-feedback cursor is rejected"""
+        response = feedback_client.get("/api/v1/feedbacks/urgent", params={"cursor": "not-a-cursor"})
+        
+        assert response.status_code == 400
 
 
 class TestFeedbackAPIErrorHandling:
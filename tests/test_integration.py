@@ -1,14 +1,14 @@
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
-from databases import Database
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class TestFullWorkflow:
     """Test complete workflows end-to-end"""
     
     @pytest.mark.asyncio
-    async def test_complete_patient_feedback_workflow(self, feedback_client: TestClient, test_db: Database):
+    async def test_complete_patient_feedback_workflow(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test complete workflow from patient creation to feedback submission"""
         
         # Step 1: Create a department
@@ -88,7 +88,7 @@ class TestFullWorkflow:
         assert department_id in [int(k) for k in stats["by_department"].keys()] or str(department_id) in stats["by_department"]
     
     @pytest.mark.asyncio
-    async def test_urgent_feedback_workflow(self, feedback_client: TestClient, test_db: Database):
+    async def test_urgent_feedback_workflow(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test workflow for urgent feedback handling"""
         
         # Create department and patient
@@ -154,7 +154,7 @@ class TestFullWorkflow:
         assert normal_feedback_id in urgent_ids2
     
     @pytest.mark.asyncio 
-    async def test_multilingual_feedback_workflow(self, feedback_client: TestClient, test_db: Database):
+    async def test_multilingual_feedback_workflow(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test workflow with multiple languages"""
         
         # Create department and patient
@@ -235,7 +235,7 @@ class TestFullWorkflow:
                 assert feedback["language"] == lang
     
     @pytest.mark.asyncio
-    async def test_feedback_status_workflow(self, feedback_client: TestClient, test_db: Database):
+    async def test_feedback_status_workflow(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test feedback status changes workflow"""
         
         # Create department and patient
@@ -362,7 +362,7 @@ class TestDataConsistency:
     """Test data consistency across operations"""
     
     @pytest.mark.asyncio
-    async def test_patient_feedback_consistency(self, feedback_client: TestClient, test_db: Database):
+    async def test_patient_feedback_consistency(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test data consistency between patients and their feedbacks"""
         
         # Create department
@@ -418,7 +418,7 @@ class TestDataConsistency:
             assert feedback_id in retrieved_ids
     
     @pytest.mark.asyncio
-    async def test_department_statistics_consistency(self, feedback_client: TestClient, test_db: Database):
+    async def test_department_statistics_consistency(self, feedback_client: TestClient, test_db: AsyncSession):
         """Test consistency of department statistics"""
         
         # Create department